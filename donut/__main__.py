@@ -1,8 +1,23 @@
 __version__ = '0.2.0'
 __author__ = 'billyeatcookies'
 
+import importlib.util
+import os
+import sys
 
-from donut import Donut
+# sibling packages (renderer, editor, mesh, pipeline...) are imported top level,
+# make that work for `python -m donut` as well as `python donut`
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
 
-donut = Donut()
+if len(sys.argv) > 1:
+    from cli import main
+    sys.exit(main())
+
+# under `python -m donut` the name `donut` is this package, so load the app from donut.py itself
+spec = importlib.util.spec_from_file_location('donut_app', os.path.join(here, 'donut.py'))
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+
+donut = app.Donut()
 donut.run()
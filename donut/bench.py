@@ -0,0 +1,143 @@
+import itertools
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from mesh import Mesh, load_obj, torus
+from pipeline import (DepthSorter, Rasterizer, backfacing, draw_shaded, face_depths, face_normals, lambert,
+                      project, rotation_matrix, to_ppm, transform)
+
+MODELS = ('cube.obj', 'horror.obj', 'sedan.obj', 'mount.obj')
+# rings, sides of the synthetic donuts, the last one is ~100k quads / 200k triangles
+SYNTHETIC = ((64, 32), (160, 100), (400, 256))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(function, repeat):
+    """min/median wall time in ms over `repeat` calls, after one warm-up call"""
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return {'min': min(times), 'median': statistics.median(times), 'runs': repeat}
+
+
+def write_obj(file_path, mesh):
+    with open(file_path, 'w') as obj_file:
+        obj_file.writelines('v %r %r %r\n' % tuple(vertex) for vertex in (mesh.vertices / 100).tolist())
+        corners = (mesh.face_vertices + 1).tolist()
+        offsets = mesh.face_offsets.tolist()
+        obj_file.writelines('f %s\n' % ' '.join(map(str, corners[start:end]))
+                            for start, end in zip(offsets, offsets[1:]))
+
+
+def canvas_stage(mesh, screen, order, repeat):
+    """Time a PolygonPool update on a real Tk canvas, None when there is no display"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+
+    from renderer.pool import PolygonPool
+
+    root.withdraw()
+    canvas = tk.Canvas(root, width=460, height=460)
+    pool = PolygonPool(canvas)
+    coords = screen[mesh.face_vertices].ravel().tolist()
+    offsets = mesh.face_offsets.tolist()
+
+    def submit():
+        pool.draw(coords, offsets, order, outline='white')
+        canvas.update_idletasks()
+
+    try:
+        return measure(submit, repeat)
+    finally:
+        root.destroy()
+
+
+def bench_mesh(mesh, obj_path, repeat, d=500, offset=230, light_source=(200, -200, 200)):
+    stages = {}
+    if obj_path is not None:
+        stages['load'] = measure(lambda: load_obj(obj_path, cache=False), repeat)
+        load_obj(obj_path)  # make sure the cache exists
+        stages['load_cached'] = measure(lambda: load_obj(obj_path), repeat)
+
+    matrix = rotation_matrix(0.5, 0.3, 0.1)
+    vertices = transform(mesh.vertices, matrix)
+    screen = project(vertices, d) + offset
+    normals = face_normals(vertices, mesh.triangles)
+    depths = face_depths(vertices, mesh.face_offsets, mesh.face_vertices)
+
+    stages['transform'] = measure(lambda: transform(mesh.vertices, matrix), repeat)
+    stages['project'] = measure(lambda: project(vertices, d) + offset, repeat)
+    stages['cull'] = measure(lambda: backfacing(face_normals(vertices, mesh.triangles)), repeat)
+    stages['shade'] = measure(lambda: lambert(normals, vertices[mesh.triangles[:, 0]], light_source), repeat)
+    stages['sort'] = measure(lambda: DepthSorter(incremental=False).sort(depths), repeat)
+
+    # steady state incremental sort, one animate() step between frames, going back and forth so every
+    # call repairs the previous order instead of finding it already sorted
+    sorter = DepthSorter()
+    sorter.sort(depths)
+    step = face_depths(transform(vertices, rotation_matrix(0.0, 0.1, 0.0)), mesh.face_offsets, mesh.face_vertices)
+    frames = itertools.cycle([step, depths])
+    stages['sort_incremental'] = measure(lambda: sorter.sort(next(frames)), repeat)
+
+    raster = Rasterizer(2 * offset, 2 * offset)
+
+    def rasterize():
+        raster.clear()
+        draw_shaded(raster, vertices, mesh.triangles, d, offset, light_source)
+
+    stages['rasterize'] = measure(rasterize, repeat)
+    stages['image'] = measure(lambda: to_ppm(raster.colour), repeat)
+
+    canvas = canvas_stage(mesh, screen, sorter.sort(depths).tolist(), repeat)
+    if canvas is not None:
+        stages['canvas'] = canvas
+
+    return {'vertices': len(mesh.vertices), 'faces': mesh.face_count,
+            'triangles': len(mesh.triangles), 'stages': stages}
+
+
+def environment(label):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'label': label, 'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def run(repeat=10, synthetic=SYNTHETIC, label=None, echo=print):
+    results = {}
+    for name in MODELS:
+        path = os.path.join(ROOT, name)
+        results[name] = bench_mesh(Mesh.from_obj(load_obj(path), scale=100), path, repeat)
+        echo(summary(name, results[name]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rings, sides in synthetic:
+            mesh = torus(rings, sides)
+            name = f'torus_{rings}x{sides}'
+            path = os.path.join(directory, name + '.obj')
+            write_obj(path, mesh)
+            results[name] = bench_mesh(mesh, path, repeat)
+            echo(summary(name, results[name]))
+
+    return {'environment': environment(label), 'results': results}
+
+
+def summary(name, result):
+    stages = ', '.join(f"{stage} {timing['median']:.2f}" for stage, timing in result['stages'].items())
+    return f"{name} ({result['faces']} faces) ms: {stages}"
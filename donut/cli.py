@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+
+from mesh import Mesh, load_obj
+from pipeline import HeadlessRenderer, render_sequence, save_image, turntable_rotations
+
+
+def parse_vector(text):
+    values = [float(value) for value in text.split(',')]
+    if len(values) != 3:
+        raise argparse.ArgumentTypeError(f"expected x,y,z, got {text!r}")
+    return tuple(values)
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {text!r}")
+    return value
+
+
+def existing_file(text):
+    if not os.path.isfile(text):
+        raise argparse.ArgumentTypeError(f"no such file: {text!r}")
+    return text
+
+
+def output_path(text):
+    if '{' in text:
+        try:
+            text.format(0)
+        except (IndexError, KeyError, ValueError):
+            raise argparse.ArgumentTypeError(f"expected one {{}} for the frame number, got {text!r}")
+    return text
+
+
+def frame_path(out, frame, frames):
+    """frame.ppm -> frame_0007.ppm when rendering a sequence, or fill in a {} pattern"""
+    if '{' in out:
+        return out.format(frame)
+    if frames == 1:
+        return out
+    root, ext = os.path.splitext(out)
+    return f"{root}_{frame:04d}{ext}"
+
+
+def render(args):
+    mesh = Mesh.from_obj(load_obj(args.model, cache=not args.no_cache), scale=args.scale)
+    options = dict(width=args.width, height=args.height, d=args.zoom, offset=args.offset,
+                   background=args.background, smooth=args.smooth)
+    rotations = turntable_rotations(args.frames, args.rot, args.step)
+    paths = [frame_path(args.out, frame, args.frames) for frame in range(args.frames)]
+
+    if args.workers == 1 or args.frames == 1:
+        renderer = HeadlessRenderer(mesh, **options)
+        for rotation, path in zip(rotations, paths):
+            save_image(path, renderer.render(rotation))
+            print(path)
+        return 0
+
+    for path in render_sequence(mesh, rotations, paths, workers=args.workers, **options):
+        print(path)
+    return 0
+
+
+def bench(args):
+    from bench import SYNTHETIC, run
+
+    report = run(args.repeat, synthetic=() if args.no_synthetic else SYNTHETIC, label=args.label)
+    with open(args.out, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(args.out)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='donut')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('render', help='render an .obj to image files without a window')
+    command.add_argument('model', type=existing_file, help='.obj file to render')
+    command.add_argument('--out', type=output_path, default='frame.ppm', help='output .ppm/.png, numbered per frame or a {} pattern')
+    command.add_argument('--rot', type=parse_vector, default=(0.0, 0.0, 0.0), help='x,y,z rotation in degrees')
+    command.add_argument('--frames', type=positive_int, default=1, help='number of turntable frames around y')
+    command.add_argument('--step', type=float, help='y degrees between frames, a full turn by default')
+    command.add_argument('--width', type=positive_int, help='image width, 2 * offset by default')
+    command.add_argument('--height', type=positive_int, help='image height, 2 * offset by default')
+    command.add_argument('--zoom', type=float, default=500, help='perspective distance, the zoom slider value')
+    command.add_argument('--offset', type=float, default=230, help='screen position of the origin')
+    command.add_argument('--scale', type=float, default=100, help='model units to pixels, load_obj uses 100')
+    command.add_argument('--background', type=parse_vector, default=(0, 0, 0), help='r,g,b background colour')
+    command.add_argument('--smooth', action='store_true', help='Gouraud shade with vn or computed vertex normals')
+    command.add_argument('--workers', type=positive_int, help='processes to render frames with, all cores by default')
+    command.add_argument('--no-cache', action='store_true', help="don't read or write the .obj.cache")
+    command.set_defaults(run=render)
+
+    command = commands.add_parser('bench', help='time each render stage on the bundled and synthetic models')
+    command.add_argument('--out', default='bench.json', help='JSON report to write')
+    command.add_argument('--repeat', type=positive_int, default=10, help='timed runs per stage')
+    command.add_argument('--label', help='free-form tag stored in the report, e.g. a version')
+    command.add_argument('--no-synthetic', action='store_true', help='skip the 100k+ face synthetic meshes')
+    command.set_defaults(run=bench)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
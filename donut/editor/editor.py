@@ -3,14 +3,12 @@ import tkinter as tk
 from tkinter import ttk
 import numpy as np
 
+from renderer import Viewport
+
+from .grid import ScreenGrid
+
+PICK_RADIUS = 5  # px around a vertex that still grabs it
 
-class Vertex:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.initial_position = (x, y, z)
-        self.current_position = (x, y, z)
 
 class Editor(ttk.Frame):
     def __init__(self, m, renderer, *a, **kw):
@@ -20,25 +18,32 @@ class Editor(ttk.Frame):
 
         self.canvas_2d = tk.Canvas(self, width=500, height=500)
         self.canvas_2d.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        self.vertices = []
-        self.connections = []
+        # cached canvas size, so projecting never asks Tk for it
+        self.viewport = Viewport(self.canvas_2d, self.on_resize)
+
+        # the renderer's mesh, vertices and connections are indices into its arrays
+        self.store = renderer.store
+        self.store.subscribe(self.on_store_change)
+        self.current = np.zeros((0, 3))  # rotated positions
+        self.screen = np.zeros((0, 2))  # canvas positions they were last drawn at
+        # canvas items per vertex and per connection, in store order, updated in place
+        self.displays = []
+        self.labels = []  # only while show_labels is on
+        self.lines = []
+        # with show_labels off one label follows the hovered (or dragged from) vertex
+        self.show_labels = tk.BooleanVar(self, value=False)
+        self.hover_label = None
+        self.hovered = None
         self.active_vertex = None
         self.line = None
-
-        for x, y, z in renderer.vertices:
-            vertex = self.canvas_2d.create_oval(0, 0, 0, 0, fill='black')
-            new_vertex = Vertex(x, y, z)
-            new_vertex.display = vertex
-            self.vertices.append(new_vertex)
-
-        for edge in renderer.edges:
-            self.connections.append((self.vertices[edge[0]], self.vertices[edge[1]]))
+        # where each vertex was last drawn, kept in sync by redraw_canvas
+        self.grid = ScreenGrid(cell=2 * PICK_RADIUS)
 
         self.canvas_2d.bind("<Button-1>", self.on_canvas_left_click)
         self.canvas_2d.bind("<Button-3>", self.on_canvas_right_click)
         self.canvas_2d.bind("<B1-Motion>", self.on_canvas_drag)
         self.canvas_2d.bind("<ButtonRelease-1>", self.on_canvas_release)
+        self.canvas_2d.bind("<Motion>", self.on_canvas_motion)
 
         self.rotation_x_slider = ttk.Scale(self, from_=0, to=360, orient=tk.HORIZONTAL,
                                           command=self.on_x_slider_change)
@@ -52,34 +57,36 @@ class Editor(ttk.Frame):
                                           command=self.on_z_slider_change)
         self.rotation_z_slider.pack()
 
+        ttk.Checkbutton(self, text="labels", variable=self.show_labels, command=self.labels_toggle).pack()
+
         self.rotation_x_angle = 0
         self.rotation_y_angle = 0
         self.rotation_z_angle = 0
+        self.rotation = np.identity(3)  # of the angles above, recomputed only when they change
+
+    def vertex_at(self, x, y):
+        # hit test against the projected positions, so picking follows the rotation
+        return self.grid.nearest(x, y, PICK_RADIUS)
 
     def on_canvas_left_click(self, event):
         x, y = event.x, event.y
-        for vertex in self.vertices:
-            if abs(vertex.x - x) <= 5 and abs(vertex.y - y) <= 5:
-                self.active_vertex = vertex
-                self.line = self.canvas_2d.create_line(x, y, x, y, fill='grey')
-                break
+        vertex = self.vertex_at(x, y)
+        if vertex is not None:
+            self.active_vertex = vertex
+            self.line = self.canvas_2d.create_line(x, y, x, y, fill='grey')
 
     def on_canvas_right_click(self, event):
         x, y = event.x, event.y
         
         # Convert screen coordinates to world coordinates with z-data based on rotation
-        vertex = Vertex(*self.screen_to_world(x, y))
-
-        self.canvas_2d.create_oval(x - 5, y - 5, x + 5, y + 5, fill='grey')
-        self.canvas_2d.create_text(x + 10, y - 10, text=f"({vertex.x:.0f}, {vertex.y:.0f}, {vertex.z:.0f})", fill='grey')
-
-        self.vertices.append(vertex)
+        # the store tells both views, this one draws it in on_store_change
+        self.store.add_vertex(*self.screen_to_world(x, y))
         #self.print_vertices_to_console()
 
     def on_canvas_drag(self, event):
         if self.line:
             x, y = event.x, event.y
-            self.canvas_2d.coords(self.line, self.active_vertex.x, self.active_vertex.y, x, y)
+            self.canvas_2d.coords(self.line, *self.screen[self.active_vertex], x, y)
 
     def on_canvas_release(self, event):
         if self.line:
@@ -88,55 +95,159 @@ class Editor(ttk.Frame):
             self.line = None
 
             # Check if there's a vertex at the release point
-            target_vertex = None
-            for vertex in self.vertices:
-                if abs(vertex.x - x) <= 5 and abs(vertex.y - y) <= 5:
-                    target_vertex = vertex
-                    break
+            target_vertex = self.vertex_at(x, y)
 
-            if target_vertex:
-                self.canvas_2d.create_line(self.active_vertex.x, self.active_vertex.y, target_vertex.x, target_vertex.y, fill='white')
-                self.connections.append((self.active_vertex, target_vertex))
-                self.print_connections_to_console()
+            if target_vertex is not None:
+                edge = self.store.add_edge(self.active_vertex, target_vertex)
+                self.print_connections_to_console(edge)
 
             self.active_vertex = None
+            self.place_hover_label()
+
+    def on_canvas_motion(self, event):
+        hovered = self.vertex_at(event.x, event.y)
+        if hovered != self.hovered:
+            self.hovered = hovered
+            self.place_hover_label()
 
     def on_x_slider_change(self, value):
-        self.rotation_x_angle = int(float(value))
-        self.redraw_canvas()
+        self.rotate(int(float(value)), self.rotation_y_angle, self.rotation_z_angle)
 
     def on_y_slider_change(self, value):
-        self.rotation_y_angle = int(float(value))
-        self.redraw_canvas()
+        self.rotate(self.rotation_x_angle, int(float(value)), self.rotation_z_angle)
 
     def on_z_slider_change(self, value):
-        self.rotation_z_angle = int(float(value))
+        self.rotate(self.rotation_x_angle, self.rotation_y_angle, int(float(value)))
+
+    def rotate(self, x, y, z):
+        # sliders fire for sub-degree moves too, those don't change anything
+        if (x, y, z) == (self.rotation_x_angle, self.rotation_y_angle, self.rotation_z_angle):
+            return
+        self.rotation_x_angle, self.rotation_y_angle, self.rotation_z_angle = x, y, z
+        self.rotation = self.rotation_matrix()
+        self.redraw_canvas()
+
+    def labels_toggle(self):
+        if self.show_labels.get():
+            self.draw_labels(0, len(self.displays))
+        else:
+            self.canvas_2d.delete(*self.labels)
+            self.labels = []
+        self.place_hover_label()
+
+    def on_resize(self, viewport):
+        # the centre moved, so does everything drawn
         self.redraw_canvas()
 
+    def on_store_change(self, kind, start, stop):
+        if kind == 'reset':
+            self.active_vertex = None
+            self.hovered = None
+            self.grid.clear()
+            self.canvas_2d.delete("all")
+            self.displays, self.labels, self.lines = [], [], []
+            self.hover_label = None
+            self.redraw_canvas()
+        elif kind == 'vertices':
+            self.draw_vertices(start, stop)
+        elif kind == 'edges':
+            self.draw_edges(start, stop)
+
     def redraw_canvas(self):
-        self.canvas_2d.delete("all")
-        for vertex in self.vertices:
-            # Apply 3D rotation using rotation matrices
-            x, y, z = vertex.initial_position
-            x, y = self.rotate_point(x, y, self.rotation_z_angle)
-            x, z = self.rotate_point(x, z, self.rotation_x_angle)
-            y, z = self.rotate_point(y, z, self.rotation_y_angle)
-            vertex.current_position = (x, y, z)
-
-            # Get canvas coordinates based on the current 3D position
-            x, y = self.world_to_screen(x, y, z)
-            vertex.display = self.canvas_2d.create_oval(x - 5, y - 5, x + 5, y + 5, fill='grey')
-            # Display the z-coordinate as text near the vertex
-            self.canvas_2d.create_text(x + 10, y - 10, text=f"({vertex.x:.2f}, {vertex.y:.2f}, {vertex.z:.2f})", fill='grey')
-
-        # Draw connections with 3D rotations
-        for vertex1, vertex2 in self.connections:
-            x1, y1, z1 = vertex1.current_position
-            x2, y2, z2 = vertex2.current_position
-            x1, y1 = self.world_to_screen(x1, y1, z1)
-            x2, y2 = self.world_to_screen(x2, y2, z2)
-            self.canvas_2d.create_line(x1, y1, x2, y2, fill='white')
-    
+        # every item already exists, the view only changed, so they are just moved
+        self.draw_vertices(0, len(self.store), moved=False)
+        self.draw_edges(len(self.lines), self.store.edge_count)
+
+    def project(self, start, stop):
+        # Apply the 3D rotation to vertices start:stop at once, then project them
+        count = len(self.store)
+        if len(self.screen) != count:
+            kept = min(count, len(self.screen))
+            self.current = np.concatenate([self.current[:kept], np.zeros((count - kept, 3))])
+            self.screen = np.concatenate([self.screen[:kept], np.zeros((count - kept, 2))])
+        self.current[start:stop] = self.store.positions[start:stop] @ self.rotation.T
+        self.screen[start:stop] = np.column_stack(self.world_to_screen(*self.current[start:stop].T))
+
+    def draw_vertices(self, start, stop, moved=True):
+        # (re)draw vertices start:stop, plus any never drawn before them,
+        # moved=False when only the view changed and the labels' text still holds
+        if start > len(self.displays):
+            start, moved = len(self.displays), True
+        self.project(start, stop)
+
+        canvas = self.canvas_2d
+        displays = self.displays
+        for index, (x, y) in enumerate(self.screen[start:stop].tolist(), start):
+            self.grid.move(index, x, y)
+            if index < len(displays):
+                canvas.coords(displays[index], x - 5, y - 5, x + 5, y + 5)
+            else:
+                displays.append(canvas.create_oval(x - 5, y - 5, x + 5, y + 5, fill='grey'))
+        if self.show_labels.get():
+            self.draw_labels(start, stop, moved)
+        self.place_hover_label()
+
+        # connections already drawn follow their moved endpoints
+        edges = self.store.edges[:len(self.lines)]
+        if moved:
+            touching = np.flatnonzero(((edges >= start) & (edges < stop)).any(axis=1))
+            edges = edges[touching]
+        else:
+            touching = range(len(edges))
+        screen = self.screen.tolist()
+        for edge, (a, b) in zip(touching, edges.tolist()):
+            canvas.coords(self.lines[edge], *screen[a], *screen[b])
+
+    def label_text(self, index):
+        # Display the coordinates as text near the vertex
+        wx, wy, wz = self.store.positions[index].tolist()
+        return f"({wx:.2f}, {wy:.2f}, {wz:.2f})"
+
+    def draw_labels(self, start, stop, moved=True):
+        start = min(start, len(self.labels))
+        for index, (x, y) in enumerate(self.screen[start:stop].tolist(), start):
+            if index < len(self.labels):
+                self.canvas_2d.coords(self.labels[index], x + 10, y - 10)
+                if moved:
+                    self.canvas_2d.itemconfigure(self.labels[index], text=self.label_text(index))
+            else:
+                self.labels.append(self.canvas_2d.create_text(x + 10, y - 10, text=self.label_text(index), fill='grey'))
+
+    def place_hover_label(self):
+        index = self.hovered if self.active_vertex is None else self.active_vertex
+        if self.show_labels.get() or index is None or index >= len(self.displays):
+            if self.hover_label is not None:
+                self.canvas_2d.itemconfigure(self.hover_label, state='hidden')
+            return
+
+        x, y = self.screen[index].tolist()
+        if self.hover_label is None:
+            self.hover_label = self.canvas_2d.create_text(x + 10, y - 10, fill='grey')
+        self.canvas_2d.coords(self.hover_label, x + 10, y - 10)
+        self.canvas_2d.itemconfigure(self.hover_label, text=self.label_text(index), state='normal')
+        self.canvas_2d.tag_raise(self.hover_label)
+
+    def draw_edges(self, start, stop):
+        # Draw connections between the projected endpoints
+        if len(self.displays) < len(self.store):
+            self.draw_vertices(len(self.displays), len(self.store))
+        start = min(start, len(self.lines))
+        screen = self.screen.tolist()
+        for edge, (a, b) in enumerate(self.store.edges[start:stop].tolist(), start):
+            if edge < len(self.lines):
+                self.canvas_2d.coords(self.lines[edge], *screen[a], *screen[b])
+            else:
+                self.lines.append(self.canvas_2d.create_line(*screen[a], *screen[b], fill='white'))
+
+    def rotation_matrix(self):
+        # the old per-vertex steps (z, then x-z, then y-z) applied to the basis vectors,
+        # so its columns are where the x, y and z axes end up
+        x, y, z = np.identity(3)
+        x, y = self.rotate_point(x, y, self.rotation_z_angle)
+        x, z = self.rotate_point(x, z, self.rotation_x_angle)
+        y, z = self.rotate_point(y, z, self.rotation_y_angle)
+        return np.array([x, y, z])
+
     @staticmethod
     def rotate_point(x, y, angle):
         # Rotate point (x, y) by angle degrees around the origin
@@ -146,23 +257,21 @@ class Editor(ttk.Frame):
         return new_x, new_y
 
     def print_vertices_to_console(self):
-        vertex_positions = [(vertex.x, vertex.y, vertex.z) for vertex in self.vertices]
+        vertex_positions = [tuple(position) for position in self.store.positions.tolist()]
         print("Vertex positions:")
         print(vertex_positions)
 
-    def print_connections_to_console(self):
-        connection_indices = []
-        for vertex1, vertex2 in self.connections:
-            index1 = self.vertices.index(vertex1)
-            index2 = self.vertices.index(vertex2)
-            connection_indices.append((index1, index2))
+    def print_connections_to_console(self, start=0):
+        # the store holds every face edge too, so only print from `start` on
+        connection_indices = [tuple(edge) for edge in self.store.edges[start:].tolist()]
         print("Connections:")
         print(connection_indices)
     
     def screen_to_world(self, x, y):
         # Convert screen coordinates to world coordinates with z-data based on rotation
-        x -= self.canvas_2d.winfo_width() / 2
-        y -= self.canvas_2d.winfo_height() / 2
+        centre_x, centre_y = self.viewport.centre
+        x -= centre_x
+        y -= centre_y
 
         # Calculate the perspective scaling factor
         distance = 500
@@ -179,8 +288,8 @@ class Editor(ttk.Frame):
         z = distance * (1 - 1 / f)
 
         # Adjust z-coordinate based on y-axis rotation angle
-        if self.active_vertex:
-            z += self.active_vertex.z
+        if self.active_vertex is not None:
+            z += self.store.positions[self.active_vertex, 2]
 
         return x, y, z
 
@@ -193,6 +302,7 @@ class Editor(ttk.Frame):
         y = y * f
 
         # Adjust coordinates to make (0, 0) represent the center of the canvas
-        x += self.canvas_2d.winfo_width() / 2
-        y += self.canvas_2d.winfo_height() / 2
+        centre_x, centre_y = self.viewport.centre
+        x += centre_x
+        y += centre_y
         return x, y
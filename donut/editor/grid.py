@@ -0,0 +1,57 @@
+import math
+
+
+class ScreenGrid:
+    """Spatial hash of 2D screen points bucketed into square cells
+
+    Points are keyed by index. `move` only touches the buckets when a point
+    changes cell, so re-adding every point after a redraw is cheap, and a
+    lookup only scans the handful of cells around the query.
+    """
+    def __init__(self, cell=16):
+        self.cell = cell
+        self.buckets = {}
+        self.points = {}  # index -> (x, y, cell key)
+
+    def __len__(self):
+        return len(self.points)
+
+    def key(self, x, y):
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def move(self, index, x, y):
+        key = self.key(x, y)
+        old = self.points.get(index)
+        if old is None or old[2] != key:
+            if old is not None:
+                self.discard(index)
+            self.buckets.setdefault(key, set()).add(index)
+        self.points[index] = (x, y, key)
+
+    def discard(self, index):
+        old = self.points.pop(index, None)
+        if old is None:
+            return
+        bucket = self.buckets[old[2]]
+        bucket.discard(index)
+        if not bucket:
+            del self.buckets[old[2]]
+
+    def clear(self):
+        self.buckets.clear()
+        self.points.clear()
+
+    def nearest(self, x, y, radius):
+        """Index of the closest point within `radius` on both axes, or None"""
+        (x0, y0), (x1, y1) = self.key(x - radius, y - radius), self.key(x + radius, y + radius)
+        best, best_distance = None, None
+        for kx in range(x0, x1 + 1):
+            for ky in range(y0, y1 + 1):
+                for index in self.buckets.get((kx, ky), ()):
+                    px, py, _ = self.points[index]
+                    if abs(px - x) > radius or abs(py - y) > radius:
+                        continue
+                    distance = (px - x) ** 2 + (py - y) ** 2
+                    if best is None or (distance, index) < (best_distance, best):
+                        best, best_distance = index, distance
+        return best
@@ -0,0 +1,8 @@
+from .adjacency import Adjacency
+from .bvh import BVH
+from .lod import build_lods, cluster
+from .mesh import Mesh, triangulate
+from .obj import ObjData, load_obj
+from .scene import Node, Scene
+from .shapes import torus
+from .store import MeshStore
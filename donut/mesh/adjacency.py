@@ -0,0 +1,143 @@
+import numpy as np
+
+
+def _csr(keys, values, count):
+    """Group `values` by `keys` in 0..count-1 into (offsets, values) CSR arrays"""
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=count), out=offsets[1:])
+    return offsets, values[order]
+
+
+class Adjacency:
+    """Connectivity of a polygon mesh as CSR index arrays
+
+    - vertex -> faces using it: `vertex_faces[vertex_face_offsets[v]:vertex_face_offsets[v + 1]]`
+    - `edges`: (E, 2) unique undirected edges of the polygon boundaries,
+      low vertex first, so an edge shared by two faces shows up once
+    - edge -> faces and face -> neighbouring faces (sharing an edge) the same way
+    - vertex -> vertices one edge away
+
+    Appending vertices that no face uses (`add_vertices`) extends it in place,
+    and so does appending faces over nothing but such vertices (`extend`).
+    Any other change to the faces needs a new index.
+    """
+    def __init__(self, face_offsets, face_vertices, vertex_count):
+        face_offsets = np.asarray(face_offsets, dtype=np.int64)
+        face_vertices = np.asarray(face_vertices, dtype=np.int64)
+        self.face_count = len(face_offsets) - 1
+        self.vertex_count = vertex_count
+
+        sizes = np.diff(face_offsets)
+        corner_faces = np.repeat(np.arange(self.face_count), sizes)
+        self.vertex_face_offsets, self.vertex_faces = _csr(face_vertices, corner_faces, vertex_count)
+
+        # every corner to the next one round its polygon
+        following = np.arange(1, len(face_vertices) + 1)
+        closing = face_offsets[1:][sizes > 0] - 1
+        following[closing] = face_offsets[:-1][sizes > 0]
+        a, b = face_vertices, face_vertices[following]
+        keep = a != b
+        low, high = np.minimum(a, b)[keep], np.maximum(a, b)[keep]
+        keys, corner_edges = np.unique(low * max(vertex_count, 1) + high, return_inverse=True)
+        corner_edges = corner_edges.ravel()
+        self.edges = np.stack([keys // max(vertex_count, 1), keys % max(vertex_count, 1)], axis=1).astype(np.int32)
+
+        # edge -> faces, a face bordering an edge twice (a slit) still counts once
+        pairs = np.unique(corner_edges * max(self.face_count, 1) + corner_faces[keep])
+        pair_edges, pair_faces = pairs // max(self.face_count, 1), pairs % max(self.face_count, 1)
+        self.edge_face_offsets, self.edge_faces = _csr(pair_edges, pair_faces, len(self.edges))
+
+        # faces sharing an edge, every ordered pair within each edge's group
+        counts = np.diff(self.edge_face_offsets)
+        squares = counts * counts
+        group = np.repeat(np.arange(len(counts)), squares)
+        within = np.arange(int(squares.sum())) - np.repeat(np.cumsum(squares) - squares, squares)
+        starts = self.edge_face_offsets[:-1][group]
+        source = self.edge_faces[starts + within // counts[group]]
+        target = self.edge_faces[starts + within % counts[group]]
+        keep = source != target
+        neighbours = np.unique(source[keep] * max(self.face_count, 1) + target[keep])
+        self.face_neighbour_offsets, self.face_neighbours = _csr(
+            neighbours // max(self.face_count, 1), neighbours % max(self.face_count, 1), self.face_count)
+
+        ends = np.concatenate([self.edges[:, 0], self.edges[:, 1]])
+        others = np.concatenate([self.edges[:, 1], self.edges[:, 0]])
+        self.vertex_neighbour_offsets, self.vertex_neighbours = _csr(ends, others, vertex_count)
+
+    @classmethod
+    def of(cls, mesh):
+        return cls(mesh.face_offsets, mesh.face_vertices, len(mesh.vertices))
+
+    def add_vertices(self, count):
+        """Make room for `count` new vertices, not used by any face yet"""
+        self.vertex_face_offsets = np.concatenate(
+            [self.vertex_face_offsets, np.repeat(self.vertex_face_offsets[-1:], count)])
+        self.vertex_neighbour_offsets = np.concatenate(
+            [self.vertex_neighbour_offsets, np.repeat(self.vertex_neighbour_offsets[-1:], count)])
+        self.vertex_count += count
+
+    def extend(self, part, vertex_start):
+        """Append the faces of `part`, the Adjacency of faces that only use vertices from `vertex_start` on
+
+        Those vertices must be the last ones and no face here may use them yet,
+        `part` numbers them from 0 and its faces continue after the ones here.
+        """
+        if self.vertex_count - vertex_start != part.vertex_count:
+            raise ValueError(f'part has {part.vertex_count} vertices, not {self.vertex_count - vertex_start}')
+        if self.vertex_face_offsets[vertex_start] != self.vertex_face_offsets[-1]:
+            raise ValueError(f'vertices from {vertex_start} on are already used by faces')
+        face_start = self.face_count
+
+        def append(offsets, values, part_offsets, part_values, shift, keep):
+            # `keep` rows of offsets stay, the part's rows follow after the values already there
+            return (np.concatenate([offsets[:keep], part_offsets + len(values)]),
+                    np.concatenate([values, part_values + shift]))
+
+        self.vertex_face_offsets, self.vertex_faces = append(
+            self.vertex_face_offsets, self.vertex_faces, part.vertex_face_offsets, part.vertex_faces, face_start,
+            vertex_start)
+        self.vertex_neighbour_offsets, self.vertex_neighbours = append(
+            self.vertex_neighbour_offsets, self.vertex_neighbours, part.vertex_neighbour_offsets,
+            part.vertex_neighbours, vertex_start, vertex_start)
+        # every old edge has a lower low vertex than the new ones, so edges stay sorted
+        self.edge_face_offsets, self.edge_faces = append(
+            self.edge_face_offsets, self.edge_faces, part.edge_face_offsets, part.edge_faces, face_start,
+            len(self.edges))
+        self.edges = np.concatenate([self.edges, part.edges + vertex_start]).astype(np.int32)
+        self.face_neighbour_offsets, self.face_neighbours = append(
+            self.face_neighbour_offsets, self.face_neighbours, part.face_neighbour_offsets, part.face_neighbours,
+            face_start, face_start)
+        self.face_count += part.face_count
+
+    def faces_of(self, start, stop=None):
+        """Sorted faces using any vertex in start:stop (just `start` without a stop)"""
+        stop = start + 1 if stop is None else stop
+        offsets = self.vertex_face_offsets
+        return np.unique(self.vertex_faces[offsets[start]:offsets[min(stop, self.vertex_count)]])
+
+    def neighbours(self, face):
+        """Faces sharing an edge with `face`"""
+        return self.face_neighbours[self.face_neighbour_offsets[face]:self.face_neighbour_offsets[face + 1]]
+
+    def vertex_neighbours_of(self, vertex):
+        """Vertices one edge away from `vertex`"""
+        offsets = self.vertex_neighbour_offsets
+        return self.vertex_neighbours[offsets[vertex]:offsets[vertex + 1]]
+
+    def edge_faces_of(self, edge):
+        return self.edge_faces[self.edge_face_offsets[edge]:self.edge_face_offsets[edge + 1]]
+
+    def vertex_normals(self, face_normals):
+        """Unit normals per vertex, the sum of `face_normals` over the faces using it
+
+        Pass unnormalized (area-weighted) face normals for the usual
+        area-weighted smooth normals. Vertices no face uses get zeros.
+        """
+        face_normals = np.asarray(face_normals, dtype=float)
+        corners = face_normals[self.vertex_faces]
+        owners = np.repeat(np.arange(self.vertex_count), np.diff(self.vertex_face_offsets))
+        normals = np.stack([np.bincount(owners, weights=corners[:, axis], minlength=self.vertex_count)
+                            for axis in range(3)], axis=1)
+        length = np.sqrt(np.einsum('ij,ij->i', normals, normals))
+        return normals / np.where(length > 0, length, 1)[:, None]
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class BVH:
+    """Bounding volume hierarchy over axis aligned boxes
+
+    Built top-down by median split on the longest axis of the box centres.
+    Nodes live in flat arrays: `low`/`high` bounds, `left`/`right` children
+    (-1 for leaves) and `start`/`count` into `order`, the primitive indices
+    sorted so every node covers one contiguous run of them.
+    """
+    def __init__(self, low, high, leaf_size=8):
+        low = np.asarray(low, dtype=float).reshape(-1, 3)
+        high = np.asarray(high, dtype=float).reshape(-1, 3)
+        centres = (low + high) / 2
+        self.order = np.arange(len(low))
+
+        bounds_low, bounds_high, starts, counts, lefts, rights = [], [], [], [], [], []
+
+        def add(start, count):
+            items = self.order[start:start + count]
+            bounds_low.append(low[items].min(axis=0) if count else np.zeros(3))
+            bounds_high.append(high[items].max(axis=0) if count else np.zeros(3))
+            starts.append(start)
+            counts.append(count)
+            lefts.append(-1)
+            rights.append(-1)
+            return len(starts) - 1
+
+        stack = [add(0, len(low))]
+        while stack:
+            node = stack.pop()
+            start, count = starts[node], counts[node]
+            if count <= leaf_size:
+                continue
+
+            items = self.order[start:start + count]
+            axis = np.argmax(np.ptp(centres[items], axis=0))
+            half = count // 2
+            split = np.argpartition(centres[items, axis], half)
+            self.order[start:start + count] = items[split]
+
+            lefts[node] = add(start, half)
+            rights[node] = add(start + half, count - half)
+            stack += [lefts[node], rights[node]]
+
+        self.low = np.array(bounds_low).reshape(-1, 3)
+        self.high = np.array(bounds_high).reshape(-1, 3)
+        self.start = np.array(starts, dtype=np.int64)
+        self.count = np.array(counts, dtype=np.int64)
+        self.left = np.array(lefts, dtype=np.int64)
+        self.right = np.array(rights, dtype=np.int64)
+
+    @classmethod
+    def for_points(cls, points, leaf_size=8):
+        return cls(points, points, leaf_size)
+
+    @classmethod
+    def for_faces(cls, vertices, face_offsets, face_vertices, leaf_size=8):
+        corners = np.asarray(vertices)[face_vertices]
+        starts = np.asarray(face_offsets[:-1])
+        if not len(starts):
+            return cls(np.zeros((0, 3)), np.zeros((0, 3)), leaf_size)
+        return cls(np.minimum.reduceat(corners, starts), np.maximum.reduceat(corners, starts), leaf_size)
+
+    def query(self, test):
+        """Indices of primitives in leaves whose node boxes all pass `test`
+
+        test(low, high) gets (K, 3) arrays of node bounds and returns a (K,)
+        bool mask; a whole subtree is skipped as soon as its box fails. Nodes
+        are tested a level at a time, so each level is one array op.
+        """
+        frontier = np.zeros(1, dtype=np.int64)
+        leaves = []
+        while len(frontier):
+            frontier = frontier[test(self.low[frontier], self.high[frontier])]
+            is_leaf = self.left[frontier] < 0
+            leaves.append(frontier[is_leaf])
+            inner = frontier[~is_leaf]
+            frontier = np.concatenate([self.left[inner], self.right[inner]])
+
+        leaves = np.concatenate(leaves)
+        counts = self.count[leaves]
+        offsets = np.repeat(self.start[leaves] - np.cumsum(counts) + counts, counts)
+        return self.order[offsets + np.arange(counts.sum())]
@@ -0,0 +1,50 @@
+import numpy as np
+
+from .mesh import Mesh
+
+
+def cluster(mesh, cells):
+    """Vertex clustering decimation on a cells^3 grid over the mesh bounds
+
+    Vertices sharing a grid cell merge into their mean, triangles that
+    collapse or end up duplicated are dropped. The result is all triangles.
+    """
+    vertices = mesh.vertices
+    low = vertices.min(axis=0)
+    size = max(float((vertices.max(axis=0) - low).max()), 1e-9) / cells
+
+    cell = np.minimum(((vertices - low) / size).astype(np.int64), cells - 1)
+    keys = (cell[:, 0] * cells + cell[:, 1]) * cells + cell[:, 2]
+    _, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+
+    counts = np.bincount(inverse)
+    merged = np.stack([np.bincount(inverse, weights=vertices[:, axis]) for axis in range(3)], axis=1)
+    merged /= counts[:, None]
+
+    triangles = inverse[mesh.triangles]
+    keep = ((triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2])
+            & (triangles[:, 0] != triangles[:, 2]))
+    triangles, materials = triangles[keep], mesh.triangle_materials[keep]
+    _, first = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+    first = np.sort(first)
+    triangles, materials = triangles[first], materials[first]
+
+    offsets = np.arange(0, 3 * len(triangles) + 1, 3)
+    return Mesh(merged, offsets, triangles.ravel(), face_materials=materials, material_colours=mesh.material_colours)
+
+
+def build_lods(mesh, min_faces=500, ratio=0.5):
+    """[mesh, coarser, ...] from full detail down to around `min_faces`
+
+    Grids are halved until a level has at most `ratio` of the previous
+    level's faces, so every kept level is a real step down in cost.
+    """
+    lods = [mesh]
+    cells = 256
+    while lods[-1].face_count > min_faces and cells >= 4:
+        lod = cluster(mesh, cells)
+        cells //= 2
+        if lod.face_count <= ratio * lods[-1].face_count:
+            lods.append(lod)
+    return lods
@@ -0,0 +1,254 @@
+import numpy as np
+
+from .adjacency import Adjacency
+from .bvh import BVH
+from .obj import DEFAULT_COLOUR
+
+
+def triangulate(face_offsets, face_vertices):
+    """Fan triangulate CSR polygons into an (F, 3) int32 index array
+
+    Returns the triangles and, for each triangle, the index of the polygon it
+    came from. Polygons with fewer than 3 corners produce no triangles.
+    """
+    face_offsets = np.asarray(face_offsets, dtype=np.int64)
+    face_vertices = np.asarray(face_vertices, dtype=np.int32)
+
+    sizes = np.diff(face_offsets)
+    per_face = np.maximum(sizes - 2, 0)
+    triangle_faces = np.repeat(np.arange(len(sizes), dtype=np.int32), per_face)
+
+    # i-th triangle of a polygon is (c0, c[i + 1], c[i + 2])
+    first = np.cumsum(per_face) - per_face
+    fan = np.arange(len(triangle_faces)) - np.repeat(first, per_face) + 1
+    start = face_offsets[:-1][triangle_faces]
+
+    triangles = np.empty((len(triangle_faces), 3), dtype=np.int32)
+    triangles[:, 0] = face_vertices[start]
+    triangles[:, 1] = face_vertices[start + fan]
+    triangles[:, 2] = face_vertices[start + fan + 1]
+    return triangles, triangle_faces
+
+
+class Mesh:
+    """Vertex array plus polygon faces, with a triangulated index buffer
+
+    `face_offsets`/`face_vertices` keep the source polygons (for outlines),
+    `triangles` is the (F, 3) int32 buffer every per-face array op runs on and
+    `triangle_faces` maps each triangle back to its polygon. `corner_normals`
+    optionally gives a normal per polygon corner (NaN rows where unknown),
+    like the vn records of an OBJ file. Every polygon has a material,
+    `face_materials` indexing the (M, 3) 0-1 diffuse `material_colours`
+    (by default one white material).
+    """
+    def __init__(self, vertices, face_offsets, face_vertices, corner_normals=None, face_materials=None,
+                 material_colours=None):
+        self.vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        self.face_offsets = np.asarray(face_offsets, dtype=np.int32)
+        self.face_vertices = np.asarray(face_vertices, dtype=np.int32)
+        self.triangles, self.triangle_faces = triangulate(self.face_offsets, self.face_vertices)
+
+        # first triangle of every polygon, -1 for degenerate ones
+        self.face_triangles = np.full(self.face_count, -1, dtype=np.int32)
+        self.face_triangles[self.triangle_faces[::-1]] = np.arange(len(self.triangles) - 1, -1, -1)
+        self._bvh = None
+        self._point_bvh = None
+        self.corner_normals = None if corner_normals is None else np.asarray(corner_normals, dtype=float)
+        if face_materials is None:
+            face_materials, material_colours = np.zeros(self.face_count, dtype=np.int32), [DEFAULT_COLOUR]
+        self.face_materials = np.asarray(face_materials, dtype=np.int32)
+        # kept as the same array when it already is one, so meshes can share a table (see Scene.flatten)
+        material_colours = np.asarray(material_colours, dtype=float)
+        self.material_colours = material_colours if material_colours.ndim == 2 else material_colours.reshape(-1, 3)
+        self._adjacency = None
+        self._vertex_normals = None
+        self._shading_normals = None
+        self._bounds = None
+
+    @classmethod
+    def from_polygons(cls, vertices, polygons):
+        sizes = [len(polygon) for polygon in polygons]
+        offsets = np.zeros(len(polygons) + 1, dtype=np.int32)
+        np.cumsum(sizes, out=offsets[1:])
+        corners = np.fromiter((i for polygon in polygons for i in polygon), dtype=np.int32, count=int(offsets[-1]))
+        return cls(vertices, offsets, corners)
+
+    @classmethod
+    def from_obj(cls, data, scale=1.0):
+        corner_normals = None
+        if len(data.normals) and (data.face_normals >= 0).any():
+            corner_normals = np.where((data.face_normals >= 0)[:, None], data.normals[data.face_normals], np.nan)
+
+        # usemtl runs to one material per distinct name, in file order
+        names = [str(name) for name in data.material_names.tolist()]
+        materials = list(dict.fromkeys(names))
+        runs = np.array([materials.index(name) for name in names], dtype=np.int32)
+        face_materials = np.repeat(runs, np.diff(data.material_offsets))
+        colours = [data.colours.get(name, DEFAULT_COLOUR) for name in materials]
+        return cls(data.positions * scale, data.face_offsets, data.face_vertices, corner_normals, face_materials,
+                   colours)
+
+    @property
+    def face_count(self):
+        return len(self.face_offsets) - 1
+
+    @property
+    def face_sizes(self):
+        return np.diff(self.face_offsets)
+
+    @property
+    def triangle_materials(self):
+        return self.face_materials[self.triangle_faces]
+
+    def subset(self, faces):
+        """A standalone Mesh of the given polygons and only the vertices they use"""
+        faces = np.asarray(faces, dtype=np.intp)
+        sizes = self.face_sizes[faces]
+        offsets = np.zeros(len(faces) + 1, dtype=np.int32)
+        np.cumsum(sizes, out=offsets[1:])
+        corners = np.repeat(self.face_offsets[faces] - offsets[:-1], sizes) + np.arange(offsets[-1])
+        used, face_vertices = np.unique(self.face_vertices[corners], return_inverse=True)
+        corner_normals = None if self.corner_normals is None else self.corner_normals[corners]
+        return Mesh(self.vertices[used], offsets, face_vertices.ravel(), corner_normals, self.face_materials[faces],
+                    self.material_colours)
+
+    def update_vertices(self, start, positions):
+        """Overwrite (or append) the positions from `start` on, faces stay as they are"""
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        stop = start + len(positions)
+        if stop > len(self.vertices):
+            if self._adjacency is not None:
+                self._adjacency.add_vertices(stop - len(self.vertices))
+            self.vertices = np.concatenate([self.vertices[:start], positions])
+        else:
+            self.vertices[start:stop] = positions
+        self._bvh = None
+        self._point_bvh = None
+        self._vertex_normals = None
+        self._shading_normals = None
+        self._bounds = None
+
+    def add_faces(self, face_offsets, face_vertices, corner_normals=None, face_materials=None,
+                  material_colours=None):
+        """Append polygons, `face_offsets` counting from 0 and `face_vertices` indexing this mesh's vertices
+
+        Only the new polygons are triangulated. When they use nothing but
+        vertices no earlier polygon does (a new object appended after its
+        vertices) the adjacency index is extended too, otherwise dropped.
+        `material_colours`, if given, replaces the table and must keep its rows.
+        """
+        face_offsets = np.asarray(face_offsets, dtype=np.int32)
+        face_vertices = np.asarray(face_vertices, dtype=np.int32)
+        face_start, corner_start, triangle_start = self.face_count, len(self.face_vertices), len(self.triangles)
+        triangles, triangle_faces = triangulate(face_offsets, face_vertices)
+        face_triangles = np.full(len(face_offsets) - 1, -1, dtype=np.int32)
+        face_triangles[triangle_faces[::-1]] = np.arange(len(triangles) - 1, -1, -1) + triangle_start
+
+        if self._adjacency is not None and len(face_vertices):
+            low = int(face_vertices.min())
+            if self._adjacency.vertex_face_offsets[low] == self._adjacency.vertex_face_offsets[-1]:
+                part = Adjacency(face_offsets, face_vertices - low, len(self.vertices) - low)
+                self._adjacency.extend(part, low)
+            else:
+                self._adjacency = None
+
+        self.triangles = np.concatenate([self.triangles, triangles])
+        self.triangle_faces = np.concatenate([self.triangle_faces, triangle_faces + face_start])
+        self.face_triangles = np.concatenate([self.face_triangles, face_triangles])
+        self.face_offsets = np.concatenate([self.face_offsets, face_offsets[1:] + corner_start])
+        self.face_vertices = np.concatenate([self.face_vertices, face_vertices])
+        if self.corner_normals is not None or corner_normals is not None:
+            old = np.full((corner_start, 3), np.nan) if self.corner_normals is None else self.corner_normals
+            new = np.full((len(face_vertices), 3), np.nan) if corner_normals is None else corner_normals
+            self.corner_normals = np.concatenate([old, np.asarray(new, dtype=float).reshape(-1, 3)])
+        if face_materials is None:
+            face_materials = np.zeros(len(face_offsets) - 1, dtype=np.int32)
+        self.face_materials = np.concatenate([self.face_materials, np.asarray(face_materials, dtype=np.int32)])
+        if material_colours is not None:
+            self.material_colours = np.asarray(material_colours, dtype=float).reshape(-1, 3)
+        self._bvh = None
+        self._vertex_normals = None
+        self._shading_normals = None
+
+    def update_corner_normals(self, start, normals):
+        """Overwrite the corner normals from corner `start` on"""
+        normals = np.asarray(normals, dtype=float).reshape(-1, 3)
+        self.corner_normals[start:start + len(normals)] = normals
+        self._shading_normals = None
+
+    def vertex_faces(self, start, stop):
+        """Sorted indices of the polygons using any vertex in start:stop"""
+        return self.adjacency.faces_of(start, stop)
+
+    @property
+    def adjacency(self):
+        """Adjacency index of the polygons, built on first use"""
+        if self._adjacency is None:
+            self._adjacency = Adjacency.of(self)
+        return self._adjacency
+
+    @property
+    def edges(self):
+        """(E, 2) unique polygon edges, a shared edge only once"""
+        return self.adjacency.edges
+
+    @property
+    def vertex_normals(self):
+        """Area-weighted smooth unit normals per vertex, computed on first use"""
+        if self._vertex_normals is None:
+            corners = self.vertices[self.triangles]
+            cross = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+            faces = np.stack([np.bincount(self.triangle_faces, weights=cross[:, axis], minlength=self.face_count)
+                              for axis in range(3)], axis=1)
+            self._vertex_normals = self.adjacency.vertex_normals(faces)
+        return self._vertex_normals
+
+    @property
+    def shading_normals(self):
+        """(normals, normal_vertices, triangle_normals) for smooth shading, built on first use
+
+        `normals` are unit normals, each belonging to vertex `normal_vertices[i]`,
+        and `triangle_normals` (F, 3) picks the normal for every triangle corner.
+        Without corner normals that is just `vertex_normals` indexed like
+        `triangles`. With them every distinct (vertex, normal) pair gets its own
+        entry, so hard edges in the file stay hard, and corners without one fall
+        back to the computed vertex normal.
+        """
+        if self._shading_normals is None:
+            if self.corner_normals is None:
+                self._shading_normals = (self.vertex_normals, np.arange(len(self.vertices)), self.triangles)
+            else:
+                normals = self.corner_normals.copy()
+                missing = np.isnan(normals).any(axis=1)
+                normals[missing] = self.vertex_normals[self.face_vertices[missing]]
+                length = np.sqrt(np.einsum('ij,ij->i', normals, normals))
+                normals /= np.where(length > 0, length, 1)[:, None]
+
+                pairs = np.column_stack([self.face_vertices, normals])
+                unique, inverse = np.unique(pairs, axis=0, return_inverse=True)
+                corner_triangles, _ = triangulate(self.face_offsets, np.arange(len(self.face_vertices)))
+                self._shading_normals = (unique[:, 1:], unique[:, 0].astype(np.intp),
+                                         inverse.ravel()[corner_triangles])
+        return self._shading_normals
+
+    @property
+    def bounds(self):
+        """(low, high) corners of the box around every vertex"""
+        if self._bounds is None:
+            vertices = self.vertices if len(self.vertices) else np.zeros((1, 3))
+            self._bounds = vertices.min(axis=0), vertices.max(axis=0)
+        return self._bounds
+
+    @property
+    def bvh(self):
+        """BVH over the polygons, built on first use"""
+        if self._bvh is None:
+            self._bvh = BVH.for_faces(self.vertices, self.face_offsets, self.face_vertices)
+        return self._bvh
+
+    @property
+    def point_bvh(self):
+        """BVH over the vertices, built on first use"""
+        if self._point_bvh is None:
+            self._point_bvh = BVH.for_points(self.vertices)
+        return self._point_bvh
@@ -0,0 +1,268 @@
+import json
+import os
+
+import numpy as np
+
+CACHE_MAGIC = b'DONUTOBJ'
+CACHE_VERSION = 3
+CACHE_SUFFIX = '.cache'
+ALIGN = 64
+
+V, VT, VN, F, G, USEMTL, MTLLIB = 1, 2, 3, 4, 5, 6, 7
+KINDS = {'v ': V, 'vt': VT, 'vn': VN, 'f ': F, 'g ': G, 'o ': G, 'us': USEMTL, 'mt': MTLLIB}
+
+DEFAULT_COLOUR = (1.0, 1.0, 1.0)  # diffuse of faces without a (known) material
+
+
+class ObjData:
+    """Packed arrays parsed from a wavefront .obj file
+
+    Faces are stored CSR style: the corners of face i are
+    `face_vertices[face_offsets[i]:face_offsets[i + 1]]`. Texcoord and normal
+    indices run parallel to `face_vertices` and are -1 where a corner has none.
+    All indices are 0 based with negative (relative) indices already resolved.
+
+    `g`/`o` groups are face ranges the same way: group i named
+    `group_names[i]` covers faces `group_offsets[i]:group_offsets[i + 1]`.
+    Faces before the first group land in one named ''. Groups without faces
+    are dropped. `usemtl` runs are kept the same way in `material_offsets`/
+    `material_names`, and `colours` maps material names to the diffuse (Kd)
+    colour found in the `libraries` (mtllib files), when there are any.
+    """
+    ARRAYS = ('positions', 'texcoords', 'normals',
+              'face_offsets', 'face_vertices', 'face_texcoords', 'face_normals',
+              'group_offsets', 'group_names', 'material_offsets', 'material_names', 'libraries')
+
+    def __init__(self, positions, texcoords, normals,
+                 face_offsets, face_vertices, face_texcoords, face_normals,
+                 group_offsets=None, group_names=None, material_offsets=None, material_names=None,
+                 libraries=None, colours=None):
+        self.positions = positions
+        self.texcoords = texcoords
+        self.normals = normals
+        self.face_offsets = face_offsets
+        self.face_vertices = face_vertices
+        self.face_texcoords = face_texcoords
+        self.face_normals = face_normals
+        if group_offsets is None:
+            group_offsets, group_names = np.array([0, self.face_count], dtype=np.int32), np.array([''])
+        if material_offsets is None:
+            material_offsets, material_names = np.array([0, self.face_count], dtype=np.int32), np.array([''])
+        self.group_offsets = group_offsets
+        self.group_names = group_names
+        self.material_offsets = material_offsets
+        self.material_names = material_names
+        self.libraries = np.array([], dtype=str) if libraries is None else libraries
+        self.colours = colours or {}
+
+    @property
+    def face_count(self):
+        return len(self.face_offsets) - 1
+
+    def groups(self):
+        """(name, first face, end face) per group"""
+        offsets = self.group_offsets.tolist()
+        return [(str(name), start, end) for name, start, end in zip(self.group_names.tolist(), offsets, offsets[1:])]
+
+    def materials(self):
+        """(material name, first face, end face) per usemtl run"""
+        offsets = self.material_offsets.tolist()
+        return [(str(name), start, end)
+                for name, start, end in zip(self.material_names.tolist(), offsets, offsets[1:])]
+
+
+def load_mtl(file_path):
+    """{material name: diffuse (r, g, b)} of a .mtl file, {} if it can't be read"""
+    colours = {}
+    name = None
+    try:
+        with open(file_path, 'r') as mtl_file:
+            for line in mtl_file:
+                fields = line.split()
+                if len(fields) >= 2 and fields[0] == 'newmtl':
+                    name = line.strip()[len('newmtl'):].strip()
+                elif len(fields) >= 4 and fields[0] == 'Kd' and name is not None:
+                    colours[name] = tuple(min(max(float(value), 0.0), 1.0) for value in fields[1:4])
+    except (OSError, ValueError):
+        return colours
+    return colours
+
+
+def _ranges(starts, count):
+    # (name, first face) starts into CSR offsets and names, without the empty ranges
+    names, firsts = zip(*starts)
+    ends = list(firsts[1:]) + [count]
+    kept = [i for i in range(len(starts)) if ends[i] > firsts[i]] or [0]
+    offsets = np.array([firsts[i] for i in kept] + [count], dtype=np.int32)
+    offsets[0] = 0
+    return offsets, np.array([names[i] for i in kept])
+
+
+def _pack(lines, width):
+    # fast path: every record has exactly `width` numbers
+    try:
+        flat = np.fromstring(' '.join(lines), dtype=np.float64, sep=' ')
+    except ValueError:  # numpy 2 raises on stray tokens instead of stopping short
+        flat = None
+    if flat is not None and flat.size == len(lines) * width:
+        return flat.reshape(-1, width)
+
+    # optional components (vt w, vertex colours...), keep the first `width`
+    return np.array([line.split()[:width] for line in lines], dtype=np.float64).reshape(-1, width)
+
+
+def _parse(file_path):
+    v, vt, vn = [], [], []
+    faces = []
+    bases = []  # v/vt/vn counts at each face, for resolving negative indices
+    groups = [('', 0)]  # name and first face of every g/o line
+    materials = [('', 0)]  # and of every usemtl line
+    libraries = []
+
+    with open(file_path, 'r') as obj_file:
+        # read in ~1MB batches of lines so big files never sit in memory as one list
+        for lines in iter(lambda: obj_file.readlines(1 << 20), []):
+            # trailing `# comments` would break the bulk number parsing below
+            lines = [line.partition('#')[0] if '#' in line else line for line in lines]
+            kinds = np.array([KINDS.get(line[:2], 0) for line in lines], dtype=np.int8)
+            seen = np.cumsum(kinds[:, None] == np.array([V, VT, VN]), axis=0)
+            for kind, records, skip in ((V, v, 2), (VT, vt, 3), (VN, vn, 3)):
+                records.extend([lines[i][skip:] for i in np.flatnonzero(kinds == kind)])
+
+            # faces before each line, so g/o/usemtl lines know where their range starts
+            faces_seen = np.cumsum(kinds == F) + len(faces)
+            for kind, starts, skip in ((G, groups, 2), (USEMTL, materials, 7)):
+                at = np.flatnonzero(kinds == kind)
+                starts.extend(zip([lines[i][skip:].strip() for i in at], faces_seen[at].tolist()))
+            libraries.extend(name for i in np.flatnonzero(kinds == MTLLIB) for name in lines[i][7:].split())
+
+            at = np.flatnonzero(kinds == F)
+            faces.extend([lines[i][2:] for i in at])
+            bases.append(seen[at] + (len(v), len(vt), len(vn)) - seen[-1])
+
+    counts = np.array([len(face.split()) for face in faces], dtype=np.int64)
+    slashes = np.array([face.count('/') for face in faces], dtype=np.int64)
+    widths = np.where(slashes == 0, 1, np.where(slashes == counts, 2, 3))
+
+    # corners are v, v/vt, v/vt/vn or v//vn; parse each layout in one bulk call
+    corner_widths = np.repeat(widths, counts)
+    indices = np.zeros((int(counts.sum()), 3), dtype=np.int64)
+    for width in (1, 2, 3):
+        selected = np.flatnonzero(widths == width)
+        if not len(selected):
+            continue
+        text = ' '.join([faces[i] for i in selected])
+        text = text.replace('//', '/0/').replace('/', ' ')
+        values = np.fromstring(text, dtype=np.int64, sep=' ').reshape(-1, width)
+        indices[corner_widths == width, :width] = values
+
+    bases = np.repeat(np.concatenate(bases or [np.empty((0, 3))]).astype(np.int64), counts, axis=0)
+    indices = np.where(indices > 0, indices - 1, np.where(indices < 0, bases + indices, -1))
+
+    offsets = np.zeros(len(faces) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+
+    group_offsets, group_names = _ranges(groups, len(faces))
+    material_offsets, material_names = _ranges(materials, len(faces))
+
+    return ObjData(
+        positions=_pack(v, 3) if v else np.empty((0, 3)),
+        texcoords=_pack(vt, 2) if vt else np.empty((0, 2)),
+        normals=_pack(vn, 3) if vn else np.empty((0, 3)),
+        face_offsets=offsets,
+        face_vertices=indices[:, 0].astype(np.int32),
+        face_texcoords=indices[:, 1].astype(np.int32),
+        face_normals=indices[:, 2].astype(np.int32),
+        group_offsets=group_offsets,
+        group_names=group_names,
+        material_offsets=material_offsets,
+        material_names=material_names,
+        libraries=np.array(libraries, dtype=str),
+    )
+
+
+def _colours(file_path, data):
+    # mtl files are small and read on every load, so editing one needs no cache invalidation
+    colours = {}
+    for library in data.libraries.tolist():
+        colours.update(load_mtl(os.path.join(os.path.dirname(file_path), library)))
+    data.colours = colours
+    return data
+
+
+def _source_key(file_path):
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'version': CACHE_VERSION}
+
+
+def _write_cache(cache_path, data, key):
+    """Header + raw arrays at aligned offsets, so the cache can be np.memmap'ed back"""
+    layout = {}
+    offset = 0
+    for name in ObjData.ARRAYS:
+        array = np.ascontiguousarray(getattr(data, name))
+        layout[name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+
+    header = json.dumps({'key': key, 'arrays': layout}).encode()
+    start = -(-(len(CACHE_MAGIC) + 4 + len(header)) // ALIGN) * ALIGN
+
+    temp_path = cache_path + '.tmp'
+    with open(temp_path, 'wb') as cache_file:
+        cache_file.write(CACHE_MAGIC)
+        cache_file.write(len(header).to_bytes(4, 'little'))
+        cache_file.write(header)
+        for name in ObjData.ARRAYS:
+            cache_file.seek(start + layout[name]['offset'])
+            cache_file.write(np.ascontiguousarray(getattr(data, name)).tobytes())
+    os.replace(temp_path, cache_path)
+
+
+def _read_cache(cache_path, key):
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            if cache_file.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                return None
+            size = int.from_bytes(cache_file.read(4), 'little')
+            header = json.loads(cache_file.read(size))
+    except (OSError, ValueError):
+        return None
+
+    if header['key'] != key:
+        return None
+
+    start = -(-(len(CACHE_MAGIC) + 4 + size) // ALIGN) * ALIGN
+    arrays = {}
+    for name, info in header['arrays'].items():
+        shape = tuple(info['shape'])
+        if not np.prod(shape):
+            arrays[name] = np.empty(shape, dtype=info['dtype'])
+            continue
+        arrays[name] = np.memmap(cache_path, dtype=info['dtype'], mode='r',
+                                 offset=start + info['offset'], shape=shape)
+    return ObjData(**arrays)
+
+
+def load_obj(file_path, cache=True):
+    """Parse a .obj file into an ObjData
+
+    With `cache` on, the parsed arrays are written next to the source as
+    `<file>.obj.cache` and memory mapped on the next load, as long as the
+    source size and mtime still match. Material libraries that are missing
+    or unreadable leave their faces at DEFAULT_COLOUR.
+    """
+    if not cache:
+        return _colours(file_path, _parse(file_path))
+
+    key = _source_key(file_path)
+    cache_path = file_path + CACHE_SUFFIX
+    data = _read_cache(cache_path, key)
+    if data is not None:
+        return _colours(file_path, data)
+
+    data = _parse(file_path)
+    try:
+        _write_cache(cache_path, data, key)
+    except OSError:
+        pass  # read-only location, just go without a cache
+    return _colours(file_path, data)
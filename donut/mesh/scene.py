@@ -0,0 +1,161 @@
+import itertools
+
+import numpy as np
+
+from .mesh import Mesh
+
+# stamps for Node.set_transform, a world matrix is current while its chain of stamps is
+_stamps = itertools.count(1)
+
+
+def _affine(matrix):
+    matrix = np.asarray(matrix, dtype=float)
+    if matrix.shape == (3, 3):
+        affine = np.identity(4)
+        affine[:3, :3] = matrix
+        return affine
+    return matrix.copy()
+
+
+def _apply(vertices, matrix):
+    return vertices @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+class Node:
+    """One object of a Scene: an optional mesh placed by a transform relative to its parent
+
+    The mesh stays in model space and may be shared by any number of nodes,
+    that is instancing: vertices, faces, normals and the BVH exist once, only
+    the 4x4 `transform` (a 3x3 one is taken as a pure linear part) is per node.
+    `world` composes the transforms down from the root and is cached until a
+    `set_transform` on the node or one of its ancestors.
+    """
+    def __init__(self, mesh=None, transform=None, name=''):
+        self.mesh = mesh
+        self.name = name
+        self.parent = None
+        self.children = []
+        self.transform = np.identity(4) if transform is None else _affine(transform)
+        self.stamp = next(_stamps)
+        self._world = None
+        self._world_key = None
+
+    def __repr__(self):
+        return f'Node({self.name!r})'
+
+    def add(self, child):
+        if child.parent is not None:
+            child.parent.children.remove(child)
+        child.parent = self
+        child.stamp = next(_stamps)  # new parent, new world
+        self.children.append(child)
+        return child
+
+    def set_transform(self, transform):
+        """Replace the local transform, False if it was the same already"""
+        transform = _affine(transform)
+        if np.array_equal(transform, self.transform):
+            return False
+        self.transform = transform
+        self.stamp = next(_stamps)
+        return True
+
+    def walk(self):
+        """This node and everything below it, parents before children"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    @property
+    def world_key(self):
+        """Changes whenever `world` does"""
+        node, key = self, []
+        while node is not None:
+            key.append(node.stamp)
+            node = node.parent
+        return tuple(key)
+
+    @property
+    def world(self):
+        """4x4 model to scene transform"""
+        key = self.world_key
+        if key != self._world_key:
+            self._world = self.transform if self.parent is None else self.parent.world @ self.transform
+            self._world_key = key
+        return self._world
+
+    def to_scene(self):
+        """The mesh's vertices and corner normals (None without) in scene space"""
+        world = self.world
+        vertices = _apply(self.mesh.vertices, world)
+        if self.mesh.corner_normals is None:
+            return vertices, None
+        # normals go through the inverse transpose, shading normalizes them again
+        return vertices, self.mesh.corner_normals @ np.linalg.inv(world[:3, :3])
+
+
+class Scene:
+    """A tree of Nodes under `root`, see `flatten` for drawing it as one Mesh"""
+    def __init__(self):
+        self.root = Node(name='scene')
+
+    def add(self, mesh=None, transform=None, name='', parent=None):
+        """New node under `parent` (the root by default), pass an existing node's mesh to instance it"""
+        return (parent or self.root).add(Node(mesh, transform, name))
+
+    @classmethod
+    def from_obj(cls, data, scale=1.0, split=False):
+        """A scene of an ObjData, one node with the whole file as its mesh
+
+        The vertex array and its indices stay as in the file. split=True makes
+        one node per g/o group instead, so groups can move on their own; each
+        gets a mesh of its own faces, and vertices two groups share are copied
+        into both.
+        """
+        mesh = Mesh.from_obj(data, scale)
+        scene = cls()
+        if not split:
+            scene.add(mesh)
+            return scene
+        for name, start, end in data.groups():
+            scene.add(mesh.subset(np.arange(start, end)), name=name)
+        return scene
+
+    def instances(self):
+        """The nodes that draw something, in `flatten` order"""
+        return [node for node in self.root.walk() if node.mesh is not None]
+
+    def flatten(self):
+        """Every instance in scene space, appended into one Mesh
+
+        Returns the mesh and per instance (node, first vertex, first face),
+        each instance's vertices and faces being contiguous from there on in
+        the same order as in its own mesh.
+        """
+        instances = self.instances()
+        vertices, offsets, corners, normals, ranges = [], [np.zeros(1, dtype=np.int32)], [], [], []
+        materials, colours, tables = [], [], {}  # each distinct material table once, by id -> first row
+        vertex_start = face_start = corner_start = material_start = 0
+        for node in instances:
+            mesh = node.mesh
+            placed, placed_normals = node.to_scene()
+            ranges.append((node, vertex_start, face_start))
+            vertices.append(placed)
+            offsets.append(mesh.face_offsets[1:] + corner_start)
+            corners.append(mesh.face_vertices + vertex_start)
+            normals.append(np.full((len(mesh.face_vertices), 3), np.nan) if placed_normals is None else placed_normals)
+            if id(mesh.material_colours) not in tables:
+                tables[id(mesh.material_colours)] = material_start
+                colours.append(mesh.material_colours)
+                material_start += len(mesh.material_colours)
+            materials.append(mesh.face_materials + tables[id(mesh.material_colours)])
+            vertex_start += len(mesh.vertices)
+            face_start += mesh.face_count
+            corner_start += len(mesh.face_vertices)
+
+        has_normals = any(node.mesh.corner_normals is not None for node in instances)
+        flat = Mesh(np.concatenate(vertices) if vertices else np.zeros((0, 3)), np.concatenate(offsets),
+                    np.concatenate(corners) if corners else np.zeros(0, dtype=np.int32),
+                    np.concatenate(normals) if has_normals else None,
+                    np.concatenate(materials) if materials else None, np.concatenate(colours) if colours else None)
+        return flat, ranges
@@ -0,0 +1,25 @@
+import numpy as np
+
+from .mesh import Mesh
+
+
+def torus(rings=48, sides=24, radius=150.0, thickness=50.0):
+    """A donut of rings * sides quads, handy as a synthetic mesh of any size"""
+    u = np.linspace(0, 2 * np.pi, rings, endpoint=False)[:, None]
+    v = np.linspace(0, 2 * np.pi, sides, endpoint=False)[None, :]
+    vertices = np.stack([
+        np.broadcast_to((radius + thickness * np.cos(v)) * np.cos(u), (rings, sides)),
+        np.broadcast_to(thickness * np.sin(v), (rings, sides)),
+        np.broadcast_to((radius + thickness * np.cos(v)) * np.sin(u), (rings, sides)),
+    ], axis=-1).reshape(-1, 3)
+
+    ring = np.arange(rings)[:, None]
+    side = np.arange(sides)[None, :]
+    a = ring * sides + side
+    b = (ring + 1) % rings * sides + side
+    c = (ring + 1) % rings * sides + (side + 1) % sides
+    d = ring * sides + (side + 1) % sides
+    quads = np.stack([a, d, c, b], axis=-1).reshape(-1)
+
+    offsets = np.arange(0, 4 * rings * sides + 1, 4)
+    return Mesh(vertices, offsets, quads)
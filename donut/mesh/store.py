@@ -0,0 +1,163 @@
+import numpy as np
+
+from .mesh import Mesh
+from .obj import DEFAULT_COLOUR
+
+
+class MeshStore:
+    """Editable mesh shared by every view of it
+
+    Positions are a growable (N, 3) array and edges a growable (E, 2) int
+    array, both doubling their capacity when full so appends stay amortized
+    O(1); `positions`/`edges` are views of the filled part. Faces are the
+    usual offsets/corners pair, together with their optional per-corner
+    normals and materials (see Mesh); they change wholesale through `load`
+    or grow by whole meshes through `add_mesh`.
+
+    Views `subscribe` a listener(kind, start, stop), called after every
+    change with the dirty index range: kind 'vertices' or 'edges' for
+    appended or moved rows, 'faces' for appended faces, 'normals' for
+    corner normals, 'reset' (range over the vertices) after `load`.
+    """
+    def __init__(self, positions=(), edges=(), face_offsets=(0,), face_vertices=(), corner_normals=None,
+                 face_materials=None, material_colours=None):
+        self.listeners = []
+        self._set(positions, edges, face_offsets, face_vertices, corner_normals, face_materials, material_colours)
+
+    def _set(self, positions, edges, face_offsets, face_vertices, corner_normals, face_materials,
+             material_colours):
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        self._positions = np.zeros((max(len(positions), 16), 3))
+        self._edges = np.zeros((max(len(edges), 16), 2), dtype=np.int32)
+        self._positions[:len(positions)] = positions
+        self._edges[:len(edges)] = edges
+        self.vertex_count = len(positions)
+        self.edge_count = len(edges)
+        self.face_offsets = np.asarray(face_offsets, dtype=np.int32)
+        self.face_vertices = np.asarray(face_vertices, dtype=np.int32)
+        self.corner_normals = None if corner_normals is None else np.array(corner_normals, dtype=float)
+        self.face_materials = face_materials
+        self.material_colours = material_colours
+
+    @classmethod
+    def from_mesh(cls, mesh, edges=()):
+        return cls(mesh.vertices, edges, mesh.face_offsets, mesh.face_vertices, mesh.corner_normals,
+                   mesh.face_materials, mesh.material_colours)
+
+    def __len__(self):
+        return self.vertex_count
+
+    @property
+    def positions(self):
+        return self._positions[:self.vertex_count]
+
+    @property
+    def edges(self):
+        return self._edges[:self.edge_count]
+
+    def mesh(self):
+        """A Mesh of the current positions and faces (positions are copied)"""
+        corner_normals = None if self.corner_normals is None else self.corner_normals.copy()
+        return Mesh(self.positions.copy(), self.face_offsets, self.face_vertices, corner_normals,
+                    self.face_materials, self.material_colours)
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def notify(self, kind, start, stop):
+        for listener in list(self.listeners):
+            listener(kind, start, stop)
+
+    @staticmethod
+    def _grow(buffer, count, extra=1):
+        if count + extra <= len(buffer):
+            return buffer
+        grown = np.zeros((max(2 * len(buffer), count + extra),) + buffer.shape[1:], dtype=buffer.dtype)
+        grown[:count] = buffer[:count]
+        return grown
+
+    def load(self, positions, edges=(), face_offsets=(0,), face_vertices=(), corner_normals=None,
+             face_materials=None, material_colours=None):
+        self._set(positions, edges, face_offsets, face_vertices, corner_normals, face_materials, material_colours)
+        self.notify('reset', 0, self.vertex_count)
+
+    def add_vertex(self, x, y, z):
+        self._positions = self._grow(self._positions, self.vertex_count)
+        self._positions[self.vertex_count] = x, y, z
+        self.vertex_count += 1
+        self.notify('vertices', self.vertex_count - 1, self.vertex_count)
+        return self.vertex_count - 1
+
+    def add_mesh(self, positions, edges=(), face_offsets=(0,), face_vertices=(), corner_normals=None,
+                 face_materials=None, material_colours=None):
+        """Append a whole mesh after everything there is, its indices counting from its own first vertex
+
+        Its material colours join the table (once per distinct colour). Notifies
+        'vertices', 'faces' and then 'edges' for the new rows and returns the
+        first new vertex and face.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        face_offsets = np.asarray(face_offsets, dtype=np.int32)
+        face_vertices = np.asarray(face_vertices, dtype=np.int32)
+        vertex_start, face_start, edge_start = self.vertex_count, len(self.face_offsets) - 1, self.edge_count
+        corner_start = int(self.face_offsets[-1])
+
+        self._positions = self._grow(self._positions, vertex_start, len(positions))
+        self._positions[vertex_start:vertex_start + len(positions)] = positions
+        self.vertex_count += len(positions)
+        self._edges = self._grow(self._edges, edge_start, len(edges))
+        self._edges[edge_start:edge_start + len(edges)] = edges + vertex_start
+        self.edge_count += len(edges)
+
+        self.face_offsets = np.concatenate([self.face_offsets, face_offsets[1:] + corner_start])
+        self.face_vertices = np.concatenate([self.face_vertices, face_vertices + vertex_start])
+        if self.corner_normals is not None or corner_normals is not None:
+            old = np.full((corner_start, 3), np.nan) if self.corner_normals is None else self.corner_normals
+            new = np.full((len(face_vertices), 3), np.nan) if corner_normals is None else corner_normals
+            self.corner_normals = np.concatenate([old, np.asarray(new, dtype=float).reshape(-1, 3)])
+        if self.face_materials is None:
+            self.face_materials, self.material_colours = np.zeros(face_start, dtype=np.int32), [DEFAULT_COLOUR]
+        if face_materials is None:
+            face_materials, material_colours = np.zeros(len(face_offsets) - 1, dtype=np.int32), [DEFAULT_COLOUR]
+        table = [tuple(colour) for colour in np.asarray(self.material_colours, dtype=float).reshape(-1, 3).tolist()]
+        rows = []
+        for colour in np.asarray(material_colours, dtype=float).reshape(-1, 3).tolist():
+            if tuple(colour) not in table:
+                table.append(tuple(colour))
+            rows.append(table.index(tuple(colour)))
+        self.face_materials = np.concatenate([self.face_materials, np.array(rows, dtype=np.int32)[face_materials]])
+        self.material_colours = np.array(table)
+
+        self.notify('vertices', vertex_start, self.vertex_count)
+        self.notify('faces', face_start, len(self.face_offsets) - 1)
+        if len(edges):
+            self.notify('edges', edge_start, self.edge_count)
+        return vertex_start, face_start
+
+    def move_vertices(self, start, positions):
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        stop = start + len(positions)
+        if stop > self.vertex_count:
+            raise IndexError(f'vertices {start}:{stop} out of range for {self.vertex_count}')
+        self._positions[start:stop] = positions
+        self.notify('vertices', start, stop)
+
+    def move_normals(self, start, normals):
+        normals = np.asarray(normals, dtype=float).reshape(-1, 3)
+        stop = start + len(normals)
+        if self.corner_normals is None or stop > len(self.corner_normals):
+            raise IndexError(f'corner normals {start}:{stop} out of range')
+        self.corner_normals[start:stop] = normals
+        self.notify('normals', start, stop)
+
+    def add_edge(self, a, b):
+        self._edges = self._grow(self._edges, self.edge_count)
+        self._edges[self.edge_count] = a, b
+        self.edge_count += 1
+        self.notify('edges', self.edge_count - 1, self.edge_count)
+        return self.edge_count - 1
@@ -0,0 +1,9 @@
+from .camera import Camera
+from .headless import HeadlessRenderer, draw_shaded, turntable_rotations
+from .picking import frustum_cull, pick_face, pick_point, screen_bounds
+from .profiler import STAGES, FrameProfiler
+from .projection import rotation_matrix, transform, project
+from .raster import Rasterizer, save_image, to_png, to_ppm
+from .sequence import render_sequence
+from .shading import VIEW_VECTOR, backfacing, face_normals, lambert, palette, shade_table
+from .sorting import DepthSorter, face_depths
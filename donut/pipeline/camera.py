@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+
+
+# what each cached matrix is built from, a change only drops the matrices that use it
+INPUTS = {
+    'model': ('rotation',),
+    'view': ('yaw', 'pitch', 'pan_x', 'pan_y'),
+    'model_view': ('rotation', 'yaw', 'pitch', 'pan_x', 'pan_y'),
+}
+
+
+def _affine(linear=None, translation=(0.0, 0.0, 0.0)):
+    matrix = np.identity(4)
+    if linear is not None:
+        matrix[:3, :3] = linear
+    matrix[:3, 3] = translation
+    return matrix
+
+
+class Camera:
+    """Orbit camera composing 4x4 model and view matrices
+
+    Same space as the rest of the pipeline: the eye looks down +z from
+    `distance` in front of the orbit target, so view-space depth is z +
+    distance and screen = focal * (x, y) / (z + distance) + offset, `offset`
+    being the viewport centre (one number for both axes, or x, y). With no
+    `fov` the focal length follows the distance like the zoom slider always
+    has; set one to zoom the lens instead. Projection itself is
+    `project(..., distance, offset, focal)`.
+
+    Matrices are cached and only rebuilt after a setter actually changes
+    one of their own inputs, so spinning the model keeps the view matrix.
+    """
+    def __init__(self, distance=500, offset=230, fov=None, height=None):
+        self.rotation = np.identity(3)  # model
+        self.yaw = 0.0
+        self.pitch = 0.0
+        self.pan_x = 0.0
+        self.pan_y = 0.0
+        self.distance = float(distance)
+        self.offset = offset
+        self.fov = fov
+        self.height = height or 2 * (offset if np.isscalar(offset) else offset[1])
+        self._cache = {}
+
+    def _set(self, **values):
+        changed = set()
+        for name, value in values.items():
+            current = getattr(self, name)
+            same = np.array_equal(current, value) if isinstance(current, np.ndarray) else current == value
+            if not same:
+                setattr(self, name, value)
+                changed.add(name)
+        for matrix in [matrix for matrix in self._cache if changed.intersection(INPUTS[matrix])]:
+            del self._cache[matrix]
+        return bool(changed)
+
+    def _cached(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    def set_model(self, rotation):
+        """Model rotation (3x3), e.g. the sliders and the spin composed"""
+        return self._set(rotation=np.asarray(rotation, dtype=float))
+
+    def orbit(self, yaw, pitch):
+        """Turn around the target by yaw (about y) and pitch (about x) radians"""
+        pitch = min(max(self.pitch + pitch, -math.pi / 2), math.pi / 2)
+        return self._set(yaw=(self.yaw + yaw) % (2 * math.pi), pitch=pitch)
+
+    def pan(self, dx, dy):
+        """Slide the view in its own plane, in view units"""
+        return self._set(pan_x=self.pan_x + dx, pan_y=self.pan_y + dy)
+
+    def dolly(self, distance):
+        """Move the eye to `distance` from the target"""
+        return self._set(distance=max(float(distance), 1.0))
+
+    def set_fov(self, fov, height=None):
+        """Vertical field of view in radians over `height` pixels, None to follow the distance"""
+        return self._set(fov=fov, height=height or self.height)
+
+    def set_viewport(self, width, height):
+        """Centre the view on a width x height canvas"""
+        return self._set(offset=(width / 2, height / 2), height=height)
+
+    @property
+    def focal(self):
+        if self.fov is None:
+            return self.distance
+        return self.height / 2 / math.tan(self.fov / 2)
+
+    @property
+    def model_matrix(self):
+        return self._cached('model', lambda: _affine(self.rotation))
+
+    @property
+    def view_matrix(self):
+        def build():
+            cy, sy = math.cos(self.yaw), math.sin(self.yaw)
+            cx, sx = math.cos(self.pitch), math.sin(self.pitch)
+            orbit = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]]) @ np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+            return _affine(orbit, (self.pan_x, self.pan_y, 0.0))
+        return self._cached('view', build)
+
+    @property
+    def model_view(self):
+        return self._cached('model_view', lambda: self.view_matrix @ self.model_matrix)
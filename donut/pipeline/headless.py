@@ -0,0 +1,89 @@
+import math
+from contextlib import nullcontext
+
+import numpy as np
+
+from .projection import project, rotation_matrix, transform
+from .raster import Rasterizer
+from .shading import backfacing, face_normals, lambert, shade_table
+
+
+def turntable_rotations(frames, rotation=(0.0, 0.0, 0.0), step=None):
+    """Per-frame x, y, z degrees spinning around y like Renderer.animate, a full turn by default"""
+    step = 360.0 / frames if step is None else step
+    x, y, z = rotation
+    return [(x, y + frame * step, z) for frame in range(frames)]
+
+
+def draw_shaded(raster, vertices, triangles, d, offset, light_source, stage=None, smooth=None, focal=None,
+                materials=None):
+    """Project, cull, shade and rasterize view-space vertices
+
+    This is the whole filled draw of Renderer's raster backend, shared so a
+    headless render frames and shades exactly like the window does. `stage`
+    is FrameProfiler.stage when timing it. Faces are flat shaded unless
+    `smooth` gives view-space (normals, normal_vertices, triangle_normals) as
+    in Mesh.shading_normals, lined up with `triangles`; then every corner is
+    lit and blended across the triangle (Gouraud). `focal` is passed on to
+    project. `materials` is (shade_table, triangle_materials) to colour the
+    shades per material instead of in grey. Returns the back-face mask.
+    """
+    stage = stage or (lambda name: nullcontext())
+    with stage('project'):
+        screen = project(vertices, d, offset, focal)
+    with stage('cull'):
+        normals = face_normals(vertices, triangles)
+        visible = ~backfacing(normals)
+    with stage('shade'):
+        if smooth is None:
+            shades = lambert(normals[visible], np.take(vertices, triangles[visible, 0], axis=0), light_source)
+        else:
+            corner_normals, normal_vertices, triangle_normals = smooth
+            shades = lambert(corner_normals, np.take(vertices, normal_vertices, axis=0), light_source)
+            shades = shades[triangle_normals[visible]]
+        if materials is None:
+            colours = np.repeat(shades[..., None], 3, axis=-1)
+        else:
+            table, triangle_materials = materials
+            triangle_materials = triangle_materials[visible]
+            colours = table[triangle_materials if shades.ndim == 1 else triangle_materials[:, None], shades]
+    with stage('rasterize'):
+        raster.draw(screen, vertices[:, 2] + d, triangles[visible], colours)
+    return ~visible
+
+
+class HeadlessRenderer:
+    """Renderer's camera, projection and shading without Tk
+
+    Zoom `d` 500 and the light match a fresh Renderer. `offset` is the
+    screen centre, and the image is a 2 * offset square by default, so the
+    model sits in the middle like Renderer centres it on its canvas. smooth=True
+    shades with the mesh's smooth normals instead of flat faces. Faces take
+    the colour of their material.
+    """
+    def __init__(self, mesh, width=None, height=None, d=500, offset=230,
+                 light_source=(200, -200, 200), background=(0, 0, 0), smooth=False):
+        self.mesh = mesh
+        self.smooth = smooth
+        self.d = d
+        self.offset = offset
+        self.light_source = light_source
+        self.raster = Rasterizer(width or 2 * offset, height or 2 * offset, background)
+        self.materials = shade_table(mesh.material_colours), mesh.triangle_materials
+
+    def render(self, rotation=(0.0, 0.0, 0.0)):
+        """(H, W, 3) uint8 frame with the mesh rotated by x, y, z degrees"""
+        matrix = rotation_matrix(*(math.radians(angle) for angle in rotation))
+        self.raster.clear()
+        smooth = None
+        if self.smooth:
+            normals, normal_vertices, triangle_normals = self.mesh.shading_normals
+            smooth = transform(normals, matrix), normal_vertices, triangle_normals
+        draw_shaded(self.raster, transform(self.mesh.vertices, matrix), self.mesh.triangles,
+                    self.d, self.offset, self.light_source, smooth=smooth, materials=self.materials)
+        return self.raster.colour.copy()
+
+    def turntable(self, frames, rotation=(0.0, 0.0, 0.0), step=None):
+        """Yield `frames` frames spinning around y like Renderer.animate, a full turn by default"""
+        for angles in turntable_rotations(frames, rotation, step):
+            yield self.render(angles)
@@ -0,0 +1,95 @@
+import numpy as np
+
+from .projection import project, transform
+
+# the 8 corners of a box as 0/1 picks between its low and high bound
+_CORNERS = np.array([[i >> 2 & 1, i >> 1 & 1, i & 1] for i in range(8)], dtype=bool)
+
+
+def screen_bounds(low, high, matrix, d, offset, focal=None):
+    """Screen rectangles (min, max) around model-space boxes after rotation and projection
+
+    `matrix` is one matrix for all boxes or an (N, 4, 4) stack, one per box.
+    Boxes reaching to or behind the eye get an unbounded rectangle, so tests
+    against them stay conservative.
+    """
+    corners = np.where(_CORNERS[None], high[:, None], low[:, None])
+    matrix = np.asarray(matrix, dtype=float)
+    if matrix.ndim == 3:
+        view = np.einsum('nij,nkj->nki', matrix[:, :3, :3], corners) + matrix[:, None, :3, 3]
+    else:
+        view = transform(corners.reshape(-1, 3), matrix).reshape(-1, 8, 3)
+    w = view[:, :, 2] + d
+    behind = (w <= 0).any(axis=1)
+
+    screen = view[:, :, :2] * ((d if focal is None else focal) / np.where(w > 0, w, 1))[:, :, None] + offset
+    smin, smax = screen.min(axis=1), screen.max(axis=1)
+    smin[behind], smax[behind] = -np.inf, np.inf
+    return smin, smax, (w <= 0).all(axis=1)
+
+
+def frustum_cull(bvh, matrix, d, offset, width, height, focal=None):
+    """Bool mask of the BVH's primitives that may land on a width x height canvas
+
+    Whole subtrees whose projected bounds miss the canvas are dropped
+    without looking at their primitives.
+    """
+    def test(low, high):
+        smin, smax, behind = screen_bounds(low, high, matrix, d, offset, focal)
+        return (~behind & (smax[:, 0] >= 0) & (smax[:, 1] >= 0)
+                & (smin[:, 0] <= width) & (smin[:, 1] <= height))
+
+    visible = np.zeros(len(bvh.order), dtype=bool)
+    visible[bvh.query(test)] = True
+    return visible
+
+
+def _near(bvh, matrix, d, offset, x, y, radius, focal):
+    def test(low, high):
+        smin, smax, behind = screen_bounds(low, high, matrix, d, offset, focal)
+        return (~behind & (smin[:, 0] - radius <= x) & (smax[:, 0] + radius >= x)
+                & (smin[:, 1] - radius <= y) & (smax[:, 1] + radius >= y))
+    return bvh.query(test)
+
+
+def pick_point(bvh, points, matrix, d, offset, x, y, radius=5, focal=None):
+    """Index of the point nearest to the eye within `radius` px of screen (x, y), or None"""
+    candidates = _near(bvh, matrix, d, offset, x, y, radius, focal)
+    if not len(candidates):
+        return None
+
+    view = transform(np.asarray(points)[candidates], matrix)
+    screen = project(view, d, offset, focal)
+    hit = ((np.abs(screen - (x, y)) <= radius).all(axis=1)) & (view[:, 2] + d > 0)
+    if not hit.any():
+        return None
+    return int(candidates[hit][np.argmin(view[hit, 2])])
+
+
+def pick_face(bvh, mesh, matrix, d, offset, x, y, focal=None):
+    """Index of the nearest polygon of `mesh` covering screen (x, y), or None
+
+    `bvh` is built over the mesh's polygons (BVH.for_faces).
+    """
+    candidates = _near(bvh, matrix, d, offset, x, y, 0, focal)
+    if not len(candidates):
+        return None
+
+    triangles = np.flatnonzero(np.isin(mesh.triangle_faces, candidates))
+    view = transform(mesh.vertices, matrix)
+    points = project(view, d, offset, focal)[mesh.triangles[triangles]]
+    depth = view[mesh.triangles[triangles], 2]
+
+    (x0, y0), (x1, y1), (x2, y2) = points[:, 0].T, points[:, 1].T, points[:, 2].T
+    area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        w1 = ((x - x0) * (y2 - y0) - (x2 - x0) * (y - y0)) / area
+        w2 = ((x1 - x0) * (y - y0) - (x - x0) * (y1 - y0)) / area
+    w0 = 1 - w1 - w2
+    inside = (area != 0) & (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (depth + d > 0).all(axis=1)
+    if not inside.any():
+        return None
+
+    z = w0 * depth[:, 0] + w1 * depth[:, 1] + w2 * depth[:, 2]
+    nearest = np.flatnonzero(inside)[np.argmin(z[inside])]
+    return int(mesh.triangle_faces[triangles[nearest]])
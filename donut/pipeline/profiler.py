@@ -0,0 +1,86 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+STAGES = ('transform', 'project', 'sort', 'cull', 'shade', 'rasterize', 'submit')
+
+
+class FrameProfiler:
+    """Opt-in per-frame, per-stage timings with face counts and rolling FPS
+
+    Wrap a frame in begin()/end() and each stage in `with profiler.stage(name)`.
+    While disabled every call is a no-op, so the hooks can stay in the draw code.
+    Keeps the last `history` frames, times are in milliseconds.
+    """
+    def __init__(self, enabled=False, history=240):
+        self.enabled = enabled
+        self.frames = deque(maxlen=history)
+        self.current = None
+
+    def begin(self):
+        if self.enabled:
+            self.current = {'start': time.perf_counter(), 'stages': {}, 'counts': {}}
+
+    def stage(self, name):
+        if not self.enabled or self.current is None:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stages = self.current['stages']
+            stages[name] = stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def count(self, **counts):
+        if self.enabled and self.current is not None:
+            self.current['counts'].update(counts)
+
+    def end(self):
+        if not self.enabled or self.current is None:
+            return
+        frame, self.current = self.current, None
+        frame['total'] = (time.perf_counter() - frame['start']) * 1000
+        self.frames.append(frame)
+
+    @property
+    def fps(self):
+        if len(self.frames) < 2:
+            return 0.0
+        elapsed = self.frames[-1]['start'] - self.frames[0]['start']
+        return (len(self.frames) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """Text for the overlay: fps, last frame's stages and counts"""
+        if not self.frames:
+            return ''
+        frame = self.frames[-1]
+        lines = [f"{self.fps:5.1f} fps  {frame['total']:6.2f} ms"]
+        lines += [f"{name:<10}{ms:6.2f} ms" for name, ms in frame['stages'].items()]
+        lines += [f"{name:<10}{value:>6}" for name, value in frame['counts'].items()]
+        return '\n'.join(lines)
+
+    def rows(self):
+        stages = [name for name in STAGES if any(name in frame['stages'] for frame in self.frames)]
+        counts = sorted({name for frame in self.frames for name in frame['counts']})
+        for index, frame in enumerate(self.frames):
+            row = {'frame': index, 'start': frame['start'], 'total_ms': frame['total']}
+            row.update({f'{name}_ms': frame['stages'].get(name) for name in stages})
+            row.update({name: frame['counts'].get(name) for name in counts})
+            yield row
+
+    def save(self, file_path):
+        """Write the recorded frames as .csv, or JSON for anything else"""
+        rows = list(self.rows())
+        with open(file_path, 'w', newline='') as stats_file:
+            if file_path.lower().endswith('.csv'):
+                writer = csv.DictWriter(stats_file, fieldnames=list(rows[0]) if rows else ['frame'])
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump({'fps': self.fps, 'frames': rows}, stats_file, indent=2)
@@ -0,0 +1,34 @@
+import math
+
+import numpy as np
+
+
+def rotation_matrix(x, y, z):
+    """Rx @ Ry @ Rz for angles in radians, same order as Renderer.update_rotation_angles"""
+    cx, sx = math.cos(x), math.sin(x)
+    cy, sy = math.cos(y), math.sin(y)
+    cz, sz = math.cos(z), math.sin(z)
+    rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return rx @ ry @ rz
+
+
+def transform(vertices, matrix):
+    """Apply a 3x3 matrix (or a 4x4 affine one, e.g. Camera.model_view) to every row of an (N, 3) vertex array"""
+    matrix = np.asarray(matrix, dtype=float)
+    if matrix.shape == (4, 4):
+        return np.asarray(vertices, dtype=float) @ matrix[:3, :3].T + matrix[:3, 3]
+    return np.asarray(vertices, dtype=float) @ matrix.T
+
+
+def project(vertices, d, offset=0.0, focal=None):
+    """Perspective divide an (N, 3) array of view-space vertices to (N, 2) screen coords
+
+    x' = x * d / (z + d), same as the old per-vertex Renderer.project_vertex,
+    with `offset` added to both axes to centre the result on the canvas. A
+    `focal` length other than the eye distance `d` narrows or widens the view.
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    scale = (d if focal is None else focal) / (vertices[:, 2] + d)
+    return vertices[:, :2] * scale[:, None] + offset
@@ -0,0 +1,147 @@
+import struct
+import zlib
+
+import numpy as np
+
+# candidate pixels tested per batch, bounds the temporary arrays
+BATCH_PIXELS = 1 << 20
+
+
+def to_ppm(colour):
+    """Binary PPM (P6) bytes of an (H, W, 3) uint8 buffer, Tk's PhotoImage reads these directly"""
+    height, width, _ = colour.shape
+    return b'P6 %d %d 255\n' % (width, height) + np.ascontiguousarray(colour).tobytes()
+
+
+def to_png(colour):
+    """PNG bytes of an (H, W, 3) uint8 buffer, stdlib zlib only"""
+    height, width, _ = colour.shape
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # filter byte 0 per row
+    rows[:, 1:] = colour.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows.tobytes()))
+            + chunk(b'IEND', b''))
+
+
+def save_image(file_path, colour):
+    """Write a colour buffer as .png, anything else gets PPM"""
+    data = to_png(colour) if file_path.lower().endswith('.png') else to_ppm(colour)
+    with open(file_path, 'wb') as image_file:
+        image_file.write(data)
+
+
+class Rasterizer:
+    """Z-buffered triangle rasterizer into a NumPy colour buffer
+
+    Triangles come in already projected to pixel coordinates, with the
+    per-vertex `z + d` from the perspective divide as depth. Depth is tested
+    on the interpolated 1 / (z + d), which is linear in screen space, so no
+    painter's sort is needed.
+    """
+    def __init__(self, width, height, background=(0, 0, 0)):
+        self.background = np.array(background, dtype=np.uint8)
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        self.width = max(int(width), 1)
+        self.height = max(int(height), 1)
+        self.colour = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.depth = np.empty((self.height, self.width))
+        self.clear()
+
+    def clear(self):
+        self.colour[:] = self.background
+        self.depth[:] = 0.0  # stores 1 / (z + d), 0 is infinitely far
+
+    def draw(self, screen, depth, triangles, colours):
+        """Rasterize (F, 3) triangles of (N, 2) `screen` points with (F, 3) uint8 `colours`
+
+        (F, 3, 3) `colours` give one colour per triangle corner instead, blended
+        across the triangle (Gouraud shading), perspective correct.
+        """
+        screen = np.asarray(screen, dtype=float)
+        depth = np.asarray(depth, dtype=float)
+        triangles = np.asarray(triangles)
+        colours = np.asarray(colours, dtype=np.uint8)
+
+        # anything touching or behind the eye would blow up the divide
+        in_front = (depth[triangles] > 0).all(axis=1)
+        triangles, colours = triangles[in_front], colours[in_front]
+
+        points = screen[triangles]
+        inverse = 1.0 / depth[triangles]
+        area = ((points[:, 1, 0] - points[:, 0, 0]) * (points[:, 2, 1] - points[:, 0, 1])
+                - (points[:, 2, 0] - points[:, 0, 0]) * (points[:, 1, 1] - points[:, 0, 1]))
+
+        low = np.floor(points.min(axis=1) - 0.5).astype(np.int64)
+        high = np.ceil(points.max(axis=1) - 0.5).astype(np.int64)
+        np.clip(low, 0, (self.width - 1, self.height - 1), out=low)
+        np.clip(high, -1, (self.width - 1, self.height - 1), out=high)
+        span = high - low + 1
+
+        keep = (area != 0) & (span > 0).all(axis=1)
+        points, inverse, area, low, span, colours = (
+            points[keep], inverse[keep], area[keep], low[keep], span[keep], colours[keep])
+
+        # group by bounding box size, rounded up in steps of sqrt(2), so each
+        # batch tests one grid shape without wasting too many pixels
+        sizes = np.ceil(2 ** (np.ceil(2 * np.log2(span)) / 2)).astype(np.int64)
+        shapes, groups = np.unique(sizes, axis=0, return_inverse=True)
+        for shape, (width, height) in enumerate(shapes.tolist()):
+            group = np.flatnonzero(groups.ravel() == shape)
+            step = max(BATCH_PIXELS // (width * height), 1)
+            for start in range(0, len(group), step):
+                batch = group[start:start + step]
+                self._fill(points[batch], inverse[batch], area[batch], low[batch], width, height, colours[batch])
+
+    def _fill(self, points, inverse, area, low, width, height, colours):
+        columns = low[:, 0, None] + np.arange(width)
+        rows = low[:, 1, None] + np.arange(height)
+        px, py = columns + 0.5, rows + 0.5
+
+        # barycentric weights (and so 1 / (z + d)) are affine in x and y,
+        # w = a * px + b * py + c, so the x and y parts are evaluated on their
+        # own axis and only broadcast to the full grid once
+        x, y = points[:, :, 0], points[:, :, 1]
+        planes = []
+        for i, j, k in ((0, 1, 2), (1, 2, 0), (2, 0, 1)):
+            planes.append(((y[:, j] - y[:, k]) / area,
+                           (x[:, k] - x[:, j]) / area,
+                           (x[:, j] * y[:, k] - x[:, k] * y[:, j]) / area))
+
+        inside = (columns < self.width)[:, None, :] & (rows < self.height)[:, :, None]
+        for a, b, c in planes:
+            inside &= ((a[:, None] * px + c[:, None])[:, None, :] + (b[:, None] * py)[:, :, None]) >= 0
+        triangle, row, column = np.nonzero(inside)
+        if not len(triangle):
+            return
+
+        (a0, b0, c0), (a1, b1, c1), (a2, b2, c2) = planes
+        i0, i1, i2 = inverse.T
+        fx, fy = px[triangle, column], py[triangle, row]
+        z = ((a0 * i0 + a1 * i1 + a2 * i2)[triangle] * fx + (b0 * i0 + b1 * i1 + b2 * i2)[triangle] * fy
+             + (c0 * i0 + c1 * i1 + c2 * i2)[triangle])
+        pixel = rows[triangle, row] * self.width + columns[triangle, column]
+
+        # depth test every fragment at once: scatter the max 1 / (z + d) into
+        # the depth buffer, the fragments that ended up there win their pixel
+        depth = self.depth.reshape(-1)
+        before = depth[pixel]
+        np.maximum.at(depth, pixel, z)
+        won = (z == depth[pixel]) & (z > before)
+        if colours.ndim == 2:
+            self.colour.reshape(-1, 3)[pixel[won]] = colours[triangle[won]]
+            return
+
+        # corner weights of the winners, barycentrics scaled by each corner's
+        # 1 / (z + d) and renormalized by the interpolated one
+        triangle, fx, fy = triangle[won], fx[won], fy[won]
+        weights = np.stack([(a[triangle] * fx + b[triangle] * fy + c[triangle]) * corner[triangle]
+                            for (a, b, c), corner in zip(planes, inverse.T)], axis=1) / z[won, None]
+        blended = np.einsum('ij,ijk->ik', weights, colours[triangle])
+        self.colour.reshape(-1, 3)[pixel[won]] = np.clip(blended + 0.5, 0, 255).astype(np.uint8)
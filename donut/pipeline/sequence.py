@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .headless import HeadlessRenderer
+from .raster import save_image
+
+# set up once per worker process by _start_worker
+_worker = {}
+
+
+class SharedMesh:
+    """What a HeadlessRenderer reads of a mesh (smooth normals too if asked), viewed out of one shared memory block"""
+    def __init__(self, buffer, layout):
+        arrays = [np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset) for dtype, shape, offset in layout]
+        self.vertices, self.triangles, self.triangle_materials, self.material_colours = arrays[:4]
+        self.shading_normals = tuple(arrays[4:]) or None
+
+
+def _share(mesh, smooth=False):
+    arrays = [np.ascontiguousarray(mesh.vertices, dtype=float), np.ascontiguousarray(mesh.triangles),
+              np.ascontiguousarray(mesh.triangle_materials), np.ascontiguousarray(mesh.material_colours)]
+    if smooth:
+        arrays += [np.ascontiguousarray(array) for array in mesh.shading_normals]
+    layout, size = [], 0
+    for array in arrays:
+        layout.append((array.dtype.str, array.shape, size))
+        size += -(-array.nbytes // 64) * 64
+
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for array, (_, _, offset) in zip(arrays, layout):
+        block.buf[offset:offset + array.nbytes] = array.tobytes()
+    return block, layout
+
+
+def _start_worker(name, layout, options):
+    block = shared_memory.SharedMemory(name=name)
+    _worker['block'] = block  # keep the mapping alive for the views below
+    _worker['renderer'] = HeadlessRenderer(SharedMesh(block.buf, layout), **options)
+
+
+def _render_frame(task):
+    rotation, path = task
+    save_image(path, _worker['renderer'].render(rotation))
+    return path
+
+
+def render_sequence(mesh, rotations, paths, workers=None, **options):
+    """Render one frame per rotation to the matching path across a process pool
+
+    The mesh arrays go into shared memory once and every worker maps them,
+    tasks only carry a rotation and an output path. `options` are passed to
+    HeadlessRenderer. Yields paths in frame order as they are written.
+    """
+    block, layout = _share(mesh, options.get('smooth', False))
+    try:
+        with ProcessPoolExecutor(workers, initializer=_start_worker,
+                                 initargs=(block.name, layout, options)) as pool:
+            yield from pool.map(_render_frame, zip(rotations, paths))
+    finally:
+        block.close()
+        block.unlink()
@@ -0,0 +1,45 @@
+import numpy as np
+
+VIEW_VECTOR = np.array([0, 0, -1])  # towards me
+
+
+def shade_table(colours):
+    """(M, 256, 3) uint8 colour of M 0-1 diffuse colours at every shade, looked up by (material, shade)"""
+    colours = np.asarray(colours, dtype=float).reshape(-1, 3)
+    return np.round(colours[:, None] * np.arange(256)[None, :, None]).astype(np.uint8)
+
+
+def palette(table):
+    """shade_table as '#rrggbb' canvas fills, an (M, 256) object array, looked up instead of formatted per face"""
+    return np.array([['#%02x%02x%02x' % tuple(rgb) for rgb in row] for row in table.tolist()], dtype=object)
+
+
+def face_normals(vertices, triangles):
+    """Unnormalized normals of an (F, 3) triangle index array"""
+    corners = np.take(vertices, triangles, axis=0)  # much faster than fancy indexing
+    a = corners[:, 1] - corners[:, 0]
+    b = corners[:, 2] - corners[:, 0]
+
+    # np.cross spelled out, about twice as fast on (F, 3) arrays
+    normals = np.empty_like(a)
+    normals[:, 0] = a[:, 1] * b[:, 2] - a[:, 2] * b[:, 1]
+    normals[:, 1] = a[:, 2] * b[:, 0] - a[:, 0] * b[:, 2]
+    normals[:, 2] = a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+    return normals
+
+
+def backfacing(normals, view_vector=VIEW_VECTOR):
+    return normals @ view_vector > 0
+
+
+def lambert(normals, points, light_source):
+    """Flat shade (0-255) for faces with `normals`, lit from `light_source` as seen from `points`"""
+    to_light = np.asarray(light_source, dtype=float) - points
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos_theta = np.einsum('ij,ij->i', normals, to_light) / np.sqrt(
+            np.einsum('ij,ij->i', normals, normals) * np.einsum('ij,ij->i', to_light, to_light))
+
+    # degenerate faces have no normal, give them the mid grey
+    shades = 255 * (np.nan_to_num(cos_theta) + 1) / 2
+    return np.clip(shades, 0, 255).astype(np.intp)
+
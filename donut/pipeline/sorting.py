@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def face_depths(vertices, face_offsets, face_vertices):
+    """Mean z of every CSR polygon"""
+    sizes = np.diff(face_offsets)
+    faces = np.repeat(np.arange(len(sizes)), sizes)
+    sums = np.bincount(faces, weights=vertices[face_vertices, 2], minlength=len(sizes))
+    return sums / np.maximum(sizes, 1)
+
+
+class DepthSorter:
+    """Painter's order (farthest first) from per-face depths
+
+    With `incremental` on, the previous frame's order is reused as the
+    starting point: if it is still sorted it is returned as is, otherwise the
+    nearly sorted sequence is fixed up with a stable (run-aware) sort, which
+    is close to linear when only a few faces swap between frames.
+    """
+    def __init__(self, incremental=True):
+        self.incremental = incremental
+        self.order = None
+
+    def reset(self):
+        self.order = None
+
+    def sort(self, depths):
+        depths = np.asarray(depths)
+        if not self.incremental or self.order is None or len(self.order) != len(depths):
+            self.order = np.argsort(-depths, kind='stable')
+            return self.order
+
+        keys = -depths[self.order]
+        if not np.any(keys[1:] < keys[:-1]):
+            return self.order
+
+        self.order = self.order[np.argsort(keys, kind='stable')]
+        return self.order
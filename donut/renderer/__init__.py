@@ -1 +1,2 @@
-from .renderer import Renderer
\ No newline at end of file
+from .renderer import Renderer
+from .viewport import Viewport
@@ -0,0 +1,112 @@
+from bisect import bisect_left
+
+
+def _stationary(ranks):
+    """Positions of a longest increasing run of `ranks` (patience sorting)
+
+    Those items already sit in the right relative stacking order and can stay
+    where they are, everything else has to be moved.
+    """
+    tails, tail_positions = [], []
+    previous = [-1] * len(ranks)
+    for position, rank in enumerate(ranks):
+        i = bisect_left(tails, rank)
+        if i:
+            previous[position] = tail_positions[i - 1]
+        if i == len(tails):
+            tails.append(rank)
+            tail_positions.append(position)
+        else:
+            tails[i] = rank
+            tail_positions[i] = position
+
+    keep = set()
+    position = tail_positions[-1] if tail_positions else -1
+    while position != -1:
+        keep.add(position)
+        position = previous[position]
+    return keep
+
+
+class PolygonPool:
+    """Retained canvas polygons, one item per mesh face
+
+    Items are created once and then updated in place with coords/itemconfigure.
+    Culled faces are hidden instead of deleted, and stacking is only touched
+    when the depth order changes, moving as few items as possible.
+    """
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.items = []
+        self.fills = []
+        self.visible = []
+        self.order = []
+        self.style = None
+
+    def clear(self):
+        if self.items:
+            self.canvas.delete(*self.items)
+        self.items = []
+        self.fills = []
+        self.visible = []
+        self.order = []
+        self.style = None
+
+    def draw(self, coords, offsets, order, fills=None, hidden=None, outline='', smooth=False, faces=None):
+        """Update the pool to show face i with `coords[2 * offsets[i]:2 * offsets[i + 1]]`
+
+        `order` lists face indices back to front, `fills` and `hidden` are per
+        face and default to no fill and nothing hidden. `faces` limits the item
+        updates to those face indices, when only they changed since the last draw.
+        """
+        count = len(offsets) - 1
+        if count != len(self.items):
+            faces = None
+            self.clear()
+            self.items = [self.canvas.create_polygon(coords[2 * offsets[i]:2 * offsets[i + 1]], fill='', state='hidden')
+                          for i in range(count)]
+            self.fills = [''] * count
+            self.visible = [False] * count
+            self.order = list(range(count))
+
+        style = (outline, bool(smooth))
+        if style != self.style:
+            for item in self.items:
+                self.canvas.itemconfigure(item, outline=outline, smooth=smooth)
+            self.style = style
+
+        canvas = self.canvas
+        for i in range(count) if faces is None else faces:
+            item = self.items[i]
+            if hidden is not None and hidden[i]:
+                if self.visible[i]:
+                    canvas.itemconfigure(item, state='hidden')
+                    self.visible[i] = False
+                continue
+
+            canvas.coords(item, coords[2 * offsets[i]:2 * offsets[i + 1]])
+            fill = fills[i] if fills is not None else ''
+            if not self.visible[i]:
+                canvas.itemconfigure(item, state='normal', fill=fill)
+                self.visible[i] = True
+                self.fills[i] = fill
+            elif fill != self.fills[i]:
+                canvas.itemconfigure(item, fill=fill)
+                self.fills[i] = fill
+
+        self.restack(list(order))
+
+    def restack(self, order):
+        if order == self.order:
+            return
+
+        rank = {face: i for i, face in enumerate(self.order)}
+        keep = _stationary([rank[face] for face in order])
+        for position, face in enumerate(order):
+            if position in keep:
+                continue
+            if position:
+                self.canvas.tag_raise(self.items[face], self.items[order[position - 1]])
+            else:
+                self.canvas.tag_lower(self.items[face])
+        self.order = order
@@ -4,13 +4,36 @@ from tkinter import ttk
 
 import numpy as np
 
+from mesh import Mesh, MeshStore, Scene, build_lods, load_obj
+from pipeline import (Camera, DepthSorter, FrameProfiler, Rasterizer, backfacing, draw_shaded, face_depths,
+                      face_normals, frustum_cull, lambert, palette, pick_face, pick_point, project, rotation_matrix,
+                      screen_bounds, shade_table, to_ppm, transform)
+
+from .pool import PolygonPool
+from .scheduler import FrameScheduler
+from .viewport import Viewport
+
+IDLE_DELAY = 250  # ms without input before going back to full detail
+
 
 class Renderer(ttk.Frame):
-    def __init__(self, master, *a, **kw):
+    """3D view of a mesh
+
+    backend="canvas" draws one canvas polygon per face, backend="raster"
+    rasterizes filled faces into a z-buffered image instead (wireframe mode
+    always uses canvas polygons), where "curves" switches to smooth shading.
+    profile=True starts with the timing overlay on, see self.profiler for
+    exporting the numbers.
+
+    What is drawn is self.scene, its instances flattened into one scene space
+    mesh (self.mesh) that the editor shares through self.store. Moving a node
+    with move_node only re-transforms that node's vertices and corner normals on the
+    next frame.
+    """
+    def __init__(self, master, *a, backend="canvas", profile=False, **kw):
         super().__init__(master, *a, **kw)
         
-        self.offset = 230
-        self.vertices = self.initial = [
+        vertices = np.array([
             (100, 100, 100),
             (100, 100, -100),
             (100, -100, 100),
@@ -19,19 +42,9 @@ class Renderer(ttk.Frame):
             (-100, 100, -100),
             (-100, -100, 100),
             (-100, -100, -100)
-        ]
+        ], dtype=float)
 
-        self.edges = [
-            (0, 1), (0, 2), (0, 4),
-            (1, 3), (1, 5),
-            (2, 3), (2, 6),
-            (3, 7),
-            (4, 5), (4, 6),
-            (5, 7),
-            (6, 7)
-        ]
-
-        self.faces = [
+        faces = [
             (0, 2, 6, 4),
             (0, 1, 3, 2),
             (0, 4, 5, 1),
@@ -39,18 +52,71 @@ class Renderer(ttk.Frame):
             (2, 3, 7, 6),
             (4, 6, 7, 5)
         ]
-
-        self.rotation_x = 0.0
-        self.rotation_y = 0.0
-        self.rotation_z = 0.0
+        self.scene = Scene()
+        self.scene.add(Mesh.from_polygons(vertices, faces), name="cube")
+        # (node, first vertex, first face) of every instance in self.mesh
+        self.mesh, self.instances = self.scene.flatten()
+        self.vertices = self.mesh.vertices  # view space after apply_rotation
+        # world_key each node's vertices in self.mesh were transformed with
+        self.synced = {node: node.world_key for node, _, _ in self.instances}
+        self.syncing = False
+        # the editable copy the editor shares, self.mesh follows its changes
+        self.store = MeshStore.from_mesh(self.mesh, self.mesh.edges)
+        self.store.subscribe(self.on_store_change)
+        # store edges no face gives (made in the editor), drawn as lines of their own
+        self.connections = np.zeros((0, 2), dtype=np.int32)
+        self.edited_connections = np.zeros(0, dtype=np.intp)
+        # decimated copies to draw while the view is moving, self.lods[0] is self.mesh
+        self.lods = build_lods(self.mesh)
+        self.lods_stale = False
+        # faces edited since the last frame, only they need new canvas items if the view is unchanged
+        self.edited = np.zeros(0, dtype=np.intp)
+        self.view = None
+        self.detail = self.mesh
+        self.interacting = False
+        self.idle_job = None
+        # the order barely changes between frames, so re-sort from the last one
+        self.sorter = DepthSorter(incremental=True)
+
+        self.slider_rotation = np.identity(3)
+        self.spin = 0.0  # y angle animate() has turned the model by
         self.light_source = [200, -200, 200]
+        # zoom slider, mouse orbit/pan/wheel and the model rotation all end up in here
+        self.camera = Camera(distance=500)
+        self.model_view = self.camera.model_view
+        self.drag = None
 
         #self.load_obj('horror.obj')
 
         self.canvas = tk.Canvas(self, width=400, height=400)
         self.canvas.pack(expand=True, fill=tk.BOTH, side=tk.LEFT)
+        self.canvas.bind("<ButtonPress-1>", self.on_drag_start)
+        self.canvas.bind("<ButtonPress-3>", self.on_drag_start)
+        self.canvas.bind("<B1-Motion>", self.on_orbit)
+        self.canvas.bind("<B3-Motion>", self.on_pan)
+        self.canvas.bind("<Double-Button-1>", self.on_focus)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", self.on_wheel)
+        self.canvas.bind("<Button-5>", self.on_wheel)
+        # size and centre come from <Configure>, the camera is re-centred only on resize
+        self.viewport = Viewport(self.canvas, self.on_resize)
+        self.camera.set_viewport(*self.viewport.size)
+        self.polygons = PolygonPool(self.canvas)
+        self.lines = PolygonPool(self.canvas)
+        # every redraw goes through here, at most one per frame
+        self.scheduler = FrameScheduler(self, self.redraw, fps=60)
+
+        self.backend = backend
+        self.profiler = FrameProfiler(enabled=profile)
+        self.overlay = None
+        self.raster = None
+        self.image = None
+        self.image_item = None
+        # colour of every material at every shade, as uint8 rows and as canvas fills
+        self.palette_key = None
+        self.colour_table = None
+        self.palette = None
 
-        self.d = 500 
         self.is_animating = False
         self.curves = False
 
@@ -62,29 +128,100 @@ class Renderer(ttk.Frame):
         self.create_gui()
 
     def on_x_rotation_change(self, _):
-        self.rotation_x = math.radians(self.x_rotation_slider.get())
         self.update_rotation_angles()
 
     def on_y_rotation_change(self, _):
-        self.rotation_y = math.radians(self.y_rotation_slider.get())
         self.update_rotation_angles()
 
     def on_z_rotation_change(self, _):
-        self.rotation_z = math.radians(self.z_rotation_slider.get())
         self.update_rotation_angles()
 
     def update_rotation_angles(self):
-        self.rotation_matrix = np.dot(self.rotate_x(math.radians(self.x_rotation_slider.get())), np.dot(self.rotate_y(math.radians(self.y_rotation_slider.get())), self.rotate_z(math.radians(self.z_rotation_slider.get()))))
-        self.vertices = [np.dot(self.rotation_matrix, vertex) for vertex in self.initial]
-        self.canvas.delete("all")
-        self.draw_mesh()
+        self.slider_rotation = rotation_matrix(math.radians(self.x_rotation_slider.get()), math.radians(self.y_rotation_slider.get()), math.radians(self.z_rotation_slider.get()))
+        self.spin = 0.0
+        self.interact()
+
+    def interact(self):
+        # coarse detail while input keeps coming, back to full detail once it settles
+        self.interacting = True
+        if self.idle_job is not None:
+            self.after_cancel(self.idle_job)
+        self.idle_job = self.after(IDLE_DELAY, self.settle)
+        self.scheduler.request()
+
+    def settle(self):
+        self.idle_job = None
+        self.interacting = False
+        self.scheduler.request()
+
+    def choose_detail(self):
+        if not (self.interacting or self.is_animating):
+            return self.lods[0]
+        if self.lods_stale:  # edited since they were built
+            self.lods = build_lods(self.mesh)
+            self.lods_stale = False
+
+        # per-face cost of the last frame says how many faces fit in the frame budget
+        cost = self.scheduler.frame_time / max(self.detail.face_count, 1)
+        for lod in self.lods:
+            if lod.face_count * cost <= self.scheduler.interval:
+                return lod
+        return self.lods[-1]
+
+    def redraw(self):
+        detail = self.choose_detail()
+        if detail is not self.detail:
+            self.detail = detail
+            self.sorter.reset()
+
+        self.profiler.begin()
+        with self.profiler.stage("transform"):
+            self.sync_scene()
+            self.apply_rotation()
+        view = self.view_key()
+        self.draw_mesh(faces=self.edited.tolist() if view == self.view else None)
+        self.draw_connections(self.edited_connections.tolist() if view == self.view else None)
+        self.view = view
+        self.edited = self.edited[:0]
+        self.edited_connections = self.edited_connections[:0]
+        self.profiler.end()
+        self.draw_overlay()
+
+    def draw_overlay(self):
+        if not self.profiler.enabled:
+            if self.overlay is not None:
+                self.canvas.delete(self.overlay)
+                self.overlay = None
+            return
+
+        if self.overlay is None:
+            self.overlay = self.canvas.create_text(8, 8, anchor=tk.NW, fill="#00ff00", font=("Courier", 9))
+        self.canvas.itemconfigure(self.overlay, text=self.profiler.summary())
+        self.canvas.tag_raise(self.overlay)
+
+    def profile_toggle(self):
+        self.profiler.enabled = not self.profiler.enabled
+        self.scheduler.request()
+
+    def view_key(self):
+        # everything besides the mesh itself that changes what the canvas shows
+        return (self.model_view.tobytes(), self.camera.distance, self.camera.focal, self.camera.offset,
+                self.wireframe, self.curves, self.backend, id(self.detail), self.canvas_size())
+
+    def apply_rotation(self):
+        # compose one model matrix and apply it to the untouched model vertices,
+        # so spinning never accumulates error and costs one batched transform
+        self.camera.set_model(rotation_matrix(0.0, self.spin, 0.0) @ self.slider_rotation)
+        self.model_view = self.camera.model_view
+        self.vertices = transform(self.detail.vertices, self.model_view)
 
     def toggle_animation(self):
         self.is_animating = not self.is_animating
         if self.is_animating:
-            self.animate()
+            self.scheduler.start(self.animate)
         else:
-            self.after_cancel(self.animation_job)
+            self.scheduler.stop()
+            self.scheduler.request()  # settle back to full detail
 
     def create_gui(self):
         self.x_rotation_slider = ttk.Scale(self, from_=1, to=360, orient=tk.HORIZONTAL)
@@ -105,121 +242,361 @@ class Renderer(ttk.Frame):
         ttk.Button(self, text="spin", command=self.toggle_animation).pack()
         ttk.Button(self, text="wireframe", command=self.wireframe_toggle).pack()
         ttk.Button(self, text="curves owo", command=self.curves_toggle).pack()
+        ttk.Button(self, text="stats", command=self.profile_toggle).pack()
         
     def wireframe_toggle(self):
         self.wireframe = not self.wireframe
-        self.canvas.delete("all")
-        self.draw_mesh()
+        self.scheduler.request()
 
     def curves_toggle(self):
         self.curves = not self.curves
-        self.canvas.delete("all")
-        self.draw_mesh()
+        self.scheduler.request()
     
-    def load_obj(self, file_path):
-        self.vertices = []
-        self.faces = []
-        with open(file_path, 'r') as obj_file:
-            for line in obj_file:
-                if line.startswith('v '):
-                    _, x, y, z = line.strip().split()
-                    self.vertices.append((float(x)*100, float(y)*100, float(z)*100))
-                elif line.startswith('f '): 
-                    _, *face_indices = line.strip().split()
-                    face_indices = [int(idx.split('/')[0]) - 1 for idx in face_indices]
-                    self.faces.append(tuple(face_indices))
-        
-        self.initial = self.vertices
-                    
-    def on_zoom_change(self, _):
-        self.d = int(self.slider.get())
-        self.canvas.delete("all")
-        self.draw_mesh()
-
-    def rotate_x(self, theta):
-        return [
-            [1, 0, 0],
-            [0, math.cos(theta), -math.sin(theta)],
-            [0, math.sin(theta), math.cos(theta)]
-        ]
+    def load_obj(self, file_path, split=None):
+        """Replace the scene with an OBJ file, split=None makes a node per g/o group when it has several
+
+        Split groups cull, move and instance on their own, see Scene.from_obj.
+        """
+        data = load_obj(file_path)
+        if split is None:
+            split = len(data.group_names) > 1
+        self.set_scene(Scene.from_obj(data, scale=100, split=split))
+
+    def set_scene(self, scene):
+        self.scene = scene
+        mesh, self.instances = scene.flatten()
+        self.synced = {node: node.world_key for node, _, _ in self.instances}
+        # the editor draws the connections, one per unique face edge
+        self.store.load(mesh.vertices, mesh.edges, mesh.face_offsets, mesh.face_vertices, mesh.corner_normals,
+                        mesh.face_materials, mesh.material_colours)
+
+    def add_instance(self, node, transform=None, name=""):
+        """Another copy of node's mesh placed by transform, the mesh's arrays are shared not copied
+
+        It is appended to the store after everything else, so what the editor
+        added stays, and only the new faces get triangulated and indexed.
+        """
+        instance = self.scene.add(node.mesh, transform, name or node.name)
+        mesh = instance.mesh
+        positions, normals = instance.to_scene()
+        vertex_start, face_start = self.store.add_mesh(positions, mesh.edges, mesh.face_offsets, mesh.face_vertices,
+                                                       normals, mesh.face_materials, mesh.material_colours)
+        self.instances.append((instance, vertex_start, face_start))
+        self.synced[instance] = instance.world_key
+        return instance
+
+    def move_node(self, node, transform):
+        if node.set_transform(transform):
+            self.scheduler.request()
+
+    def sync_scene(self):
+        # re-transform only the instances whose world matrix changed since they were last synced
+        self.syncing = True
+        try:
+            for node, vertex_start, face_start in self.instances:
+                key = node.world_key
+                if self.synced.get(node) != key:
+                    self.synced[node] = key
+                    positions, normals = node.to_scene()
+                    self.store.move_vertices(vertex_start, positions)
+                    if normals is not None:  # smooth shading would light the object as it was
+                        self.store.move_normals(int(self.store.face_offsets[face_start]), normals)
+        finally:
+            self.syncing = False
+
+    def edit_instances(self, start, stop):
+        # scene space edits go back into the model space meshes, and from there to their other instances
+        edited = set()
+        for node, vertex_start, _ in self.instances:
+            low, high = max(start, vertex_start), min(stop, vertex_start + len(node.mesh.vertices))
+            if low < high:
+                local = transform(self.store.positions[low:high], np.linalg.inv(node.world))
+                node.mesh.update_vertices(low - vertex_start, local)
+                edited.add(node.mesh)
+        for node, vertex_start, _ in self.instances:
+            overlaps = start < vertex_start + len(node.mesh.vertices) and stop > vertex_start
+            if node.mesh in edited and not overlaps:
+                self.synced[node] = None
+
+    def find_connections(self, start, stop):
+        # the store edges in start:stop that aren't an edge of a face
+        edges = np.sort(self.store.edges[start:stop], axis=1).astype(np.int64)
+        face_edges = self.mesh.edges.astype(np.int64)
+        given = np.isin(edges[:, 0] << 32 | edges[:, 1], face_edges[:, 0] << 32 | face_edges[:, 1])
+        return self.store.edges[start:stop][~given]
+
+    def on_store_change(self, kind, start, stop):
+        if kind == "reset":
+            self.mesh = self.store.mesh()
+            self.connections = self.find_connections(0, self.store.edge_count)
+            self.edited_connections = self.edited_connections[:0]
+            self.lines.clear()
+            self.vertices = self.mesh.vertices
+            self.lods = build_lods(self.mesh)
+            self.lods_stale = False
+            self.detail = self.mesh
+            self.sorter.reset()
+            self.polygons.clear()
+            self.view = None
+            self.scheduler.request()
+        elif kind == "vertices":
+            self.mesh.update_vertices(start, self.store.positions[start:stop])
+            if not self.syncing:  # an edit from outside, not sync_scene moving a node
+                self.edit_instances(start, stop)
+            faces = self.mesh.vertex_faces(start, stop)
+            if len(faces):  # vertices no face uses don't show up here
+                self.edited = np.union1d(self.edited, faces)
+                self.lods_stale = True
+                if not self.syncing:
+                    self.scheduler.request()
+            moved = np.flatnonzero(((self.connections >= start) & (self.connections < stop)).any(axis=1))
+            if len(moved):
+                self.edited_connections = np.union1d(self.edited_connections, moved)
+                self.scheduler.request()
+        elif kind == "faces":
+            offsets = self.store.face_offsets[start:stop + 1]
+            corners = slice(int(offsets[0]), int(offsets[-1]))
+            normals = None if self.store.corner_normals is None else self.store.corner_normals[corners]
+            self.mesh.add_faces(offsets - offsets[0], self.store.face_vertices[corners], normals,
+                                self.store.face_materials[start:stop], self.store.material_colours)
+            self.lods_stale = True
+            self.sorter.reset()
+            self.view = None
+            self.scheduler.request()
+        elif kind == "normals":
+            self.mesh.update_corner_normals(start, self.store.corner_normals[start:stop])
+            if not self.syncing:
+                self.scheduler.request()
+        elif kind == "edges":
+            self.connections = np.concatenate([self.connections, self.find_connections(start, stop)])
+            self.scheduler.request()
 
-    def rotate_y(self, theta):
-        return [
-            [math.cos(theta), 0, math.sin(theta)],
-            [0, 1, 0],
-            [-math.sin(theta), 0, math.cos(theta)]
-        ]
+    def on_zoom_change(self, _):
+        if self.camera.dolly(int(self.slider.get())):
+            self.interact()
+
+    def on_resize(self, viewport):
+        if self.camera.set_viewport(*viewport.size):
+            self.scheduler.request()
+
+    def on_drag_start(self, event):
+        self.drag = (event.x, event.y)
+
+    def drag_delta(self, event):
+        last, self.drag = self.drag or (event.x, event.y), (event.x, event.y)
+        return event.x - last[0], event.y - last[1]
+
+    def on_orbit(self, event):
+        dx, dy = self.drag_delta(event)
+        if self.camera.orbit(math.radians(dx) / 2, -math.radians(dy) / 2):
+            self.interact()
+
+    def on_pan(self, event):
+        # move by screen pixels at the target's depth
+        dx, dy = self.drag_delta(event)
+        scale = self.camera.distance / self.camera.focal
+        if self.camera.pan(dx * scale, dy * scale):
+            self.interact()
+
+    def on_focus(self, event):
+        # double click centres the view on the vertex under the cursor, or else the face
+        vertex = self.pick_vertex(event.x, event.y)
+        if vertex is not None:
+            point = self.mesh.vertices[vertex]
+        else:
+            face = self.pick_face(event.x, event.y)
+            if face is None:
+                return
+            corners = self.mesh.face_vertices[self.mesh.face_offsets[face]:self.mesh.face_offsets[face + 1]]
+            point = self.mesh.vertices[corners].mean(axis=0)
+        x, y, _ = transform(point[None], self.model_view)[0]
+        if self.camera.pan(-x, -y):
+            self.interact()
+
+    def on_wheel(self, event):
+        closer = event.num == 4 or event.delta > 0
+        self.slider.set(max(1, min(500, self.camera.distance * (0.9 if closer else 1 / 0.9))))
+        self.on_zoom_change(None)
 
-    def rotate_z(self, theta):
-        return [
-            [math.cos(theta), -math.sin(theta), 0],
-            [math.sin(theta), math.cos(theta), 0],
-            [0, 0, 1]
-        ]
+    def perspective_projection(self, vertices):
+        # vertices are already in view space, project the whole array in one go
+        return project(vertices, self.camera.distance, focal=self.camera.focal)
+
+    def cull_and_shade(self):
+        # one triangle per polygon, the first three corners like the old per-face code
+        first = self.detail.face_triangles
+        triangles = self.detail.triangles[first]
+        with self.profiler.stage("cull"):
+            normals = face_normals(self.vertices, triangles)
+            culled = backfacing(normals) | (first < 0)
+        with self.profiler.stage("shade"):
+            shades = lambert(normals, np.take(self.vertices, triangles[:, 0], axis=0), self.light_source)
+        return normals, culled, shades
 
-    def project_vertex(self, vertex):
-        transformed_vertex = np.dot(self.rotation_matrix, vertex)
-        x, y, z = transformed_vertex
-        if z != 0:
-            projected_x = x * self.d / (z + self.d)
-            projected_y = y * self.d / (z + self.d)
-            return projected_x, projected_y
+    def sort_faces(self):
+        # face indices, farthest first
+        with self.profiler.stage("sort"):
+            depths = face_depths(self.vertices, self.detail.face_offsets, self.detail.face_vertices)
+            return self.sorter.sort(depths)
+
+    def materials(self):
+        # rebuilt only when the material colours change, faces then just look their colour up
+        key = self.detail.material_colours.tobytes()
+        if key != self.palette_key:
+            self.palette_key = key
+            self.colour_table = shade_table(self.detail.material_colours)
+            self.palette = palette(self.colour_table)
+        return self.colour_table, self.palette
+
+    def canvas_size(self):
+        return self.viewport.size
+
+    def frustum_cull(self):
+        # faces whose bounds can reach the canvas, whole off-screen subtrees are skipped at once
+        camera = self.camera
+        width, height = self.canvas_size()
+        with self.profiler.stage("cull"):
+            if self.detail is not self.mesh:
+                return frustum_cull(self.detail.bvh, self.model_view, camera.distance, camera.offset, width, height,
+                                    focal=camera.focal)
+
+            # at full detail per node, all node boxes tested at once: objects off screen are dropped and
+            # objects wholly on it kept without looking further (never building their BVH), only the rest go
+            # through their mesh's BVH, which instances share and moving doesn't touch
+            visible = np.zeros(self.mesh.face_count, dtype=bool)
+            nodes = [node for node, _, _ in self.instances]
+            low = np.array([node.mesh.bounds[0] for node in nodes]).reshape(-1, 3)
+            high = np.array([node.mesh.bounds[1] for node in nodes]).reshape(-1, 3)
+            matrices = self.model_view @ np.array([node.world for node in nodes]).reshape(-1, 4, 4)
+            smin, smax, behind = screen_bounds(low, high, matrices, camera.distance, camera.offset, camera.focal)
+            reaches = ~behind & (smax >= 0).all(axis=1) & (smin <= (width, height)).all(axis=1)
+            inside = (smin >= 0).all(axis=1) & (smax <= (width, height)).all(axis=1)
+            for i in np.flatnonzero(reaches).tolist():
+                node, _, face_start = self.instances[i]
+                faces = slice(face_start, face_start + node.mesh.face_count)
+                visible[faces] = True if inside[i] else frustum_cull(
+                    node.mesh.bvh, self.model_view @ node.world, camera.distance, camera.offset, width, height,
+                    focal=camera.focal)
+            return visible
+
+    def pick_vertex(self, x, y, radius=5):
+        """Index of the full detail vertex under canvas (x, y), nearest to the eye, or None"""
+        return pick_point(self.mesh.point_bvh, self.mesh.vertices, self.model_view, self.camera.distance,
+                          self.camera.offset, x, y, radius, focal=self.camera.focal)
+
+    def pick_face(self, x, y):
+        """Index of the full detail face under canvas (x, y), nearest to the eye, or None"""
+        return pick_face(self.mesh.bvh, self.mesh, self.model_view, self.camera.distance, self.camera.offset, x, y,
+                         focal=self.camera.focal)
+
+    def draw_raster(self):
+        width, height = self.canvas_size()
+
+        if self.raster is None:
+            background = [channel >> 8 for channel in self.canvas.winfo_rgb(self.canvas["background"])]
+            self.raster = Rasterizer(width, height, background)
+            self.image = tk.PhotoImage(master=self.canvas)
+            self.image_item = self.canvas.create_image(0, 0, image=self.image, anchor=tk.NW)
+        elif (width, height) != (self.raster.width, self.raster.height):
+            self.raster.resize(width, height)
         else:
-            return x, y
-
+            self.raster.clear()
+
+        # same framing as the polygons, pixel coords are canvas coords
+        inside = self.frustum_cull()[self.detail.triangle_faces]
+        triangles = self.detail.triangles[inside]
+        materials = self.materials()[0], self.detail.triangle_materials[inside]
+        smooth = None
+        if self.curves:  # smooth shading, normals turn with the model
+            with self.profiler.stage("transform"):
+                normals, normal_vertices, triangle_normals = self.detail.shading_normals
+                smooth = transform(normals, self.model_view[:3, :3]), normal_vertices, triangle_normals[inside]
+        culled = draw_shaded(self.raster, self.vertices, triangles, self.camera.distance, self.camera.offset,
+                             self.light_source, stage=self.profiler.stage, smooth=smooth, focal=self.camera.focal,
+                             materials=materials)
+        drawn = int(len(culled) - culled.sum())
+        self.profiler.count(drawn=drawn, culled=len(self.detail.triangles) - drawn)
+
+        with self.profiler.stage("submit"):
+            self.image.configure(data=to_ppm(self.raster.colour), format="PPM")
+            self.canvas.itemconfigure(self.image_item, state="normal")
+
+    def draw_edges(self, screen, outside, faces=None):
+        # every unique edge once, as a two point polygon so the same pool keeps the items
+        adjacency = self.detail.adjacency
+        edges = adjacency.edges
+        owners = np.repeat(np.arange(len(edges)), np.diff(adjacency.edge_face_offsets))
+        hidden = np.bincount(owners, weights=~outside[adjacency.edge_faces], minlength=len(edges)) == 0
+        if faces is not None:
+            faces = np.unique(owners[np.isin(adjacency.edge_faces, faces)]).tolist()
+
+        with self.profiler.stage("project"):
+            coords = screen[edges].ravel().tolist()
+            offsets = list(range(0, 2 * len(edges) + 1, 2))
+        self.profiler.count(drawn=int(len(hidden) - hidden.sum()), culled=int(hidden.sum()))
+        with self.profiler.stage("submit"):
+            self.polygons.draw(coords, offsets, range(len(edges)), hidden=hidden.tolist(), outline="white",
+                               faces=faces)
+
+    def draw_connections(self, edges=None):
+        # over whatever the backend drew, from the full detail vertices; `edges` limits it to those that moved
+        if not len(self.connections):
+            self.lines.clear()
+            return
 
-    def perspective_projection(self, vertices):
-        projected_vertices = [self.project_vertex(vertex) for vertex in vertices]
-        return projected_vertices
+        with self.profiler.stage("project"):
+            used, ends = np.unique(self.connections, return_inverse=True)
+            view = transform(self.mesh.vertices[used], self.model_view)
+            screen = self.perspective_projection(view) + self.camera.offset
+            ends = ends.reshape(-1, 2)
+            behind = (view[:, 2] + self.camera.distance <= 0)[ends].any(axis=1)
+            coords = screen[ends].ravel().tolist()
+            offsets = list(range(0, 2 * len(ends) + 1, 2))
+        with self.profiler.stage("submit"):
+            self.lines.draw(coords, offsets, range(len(ends)), hidden=behind.tolist(), outline="white", faces=edges)
+            if edges is None:  # the mesh items may have been recreated on top
+                for item in self.lines.items:
+                    self.canvas.tag_raise(item)
+
+    def draw_mesh(self, faces=None):
+        if self.backend == "raster" and not self.wireframe:
+            self.polygons.clear()
+            self.draw_raster()
+            return
 
-    def is_backfacing(self, face):
-        v1 = np.array(self.vertices[face[0]])
-        v2 = np.array(self.vertices[face[1]])
-        v3 = np.array(self.vertices[face[2]])
-        normal = np.cross(v2 - v1, v3 - v1)
+        if self.image_item is not None:
+            self.canvas.itemconfigure(self.image_item, state="hidden")
 
-        view_vector = np.array([0, 0, -1])  # towards me
-        return np.dot(normal, view_vector) > 0
+        # project every vertex once, faces then just gather their screen coords by index
+        with self.profiler.stage("project"):
+            screen = self.perspective_projection(self.vertices) + self.camera.offset
 
-    def sort_faces(self):
-        face_depths = []
-        for face in self.faces:
-            depth_sum = 0
-            for vertex_index in face:
-                x, y, z = self.vertices[vertex_index]
-                depth_sum += z
-            avg_depth = depth_sum / len(face)
-            face_depths.append((face, avg_depth))
-
-        sorted_faces = sorted(face_depths, key=lambda item: item[1], reverse=True)
-        return [face for face, _ in sorted_faces]
-
-    def draw_mesh(self):
-        if self.wireframe:
-            for face in self.sort_faces():
-                coords = self.perspective_projection([self.vertices[i] for i in face])
-                coords = [(x + self.offset, y + self.offset) for x, y in coords]  # Offset the coordinates
-                self.canvas.create_polygon(coords, outline="white", fill="", smooth=self.curves)
+        outside = ~self.frustum_cull()
+        if self.wireframe and not self.curves:
+            self.draw_edges(screen, outside, faces)
             return
-        
-        for face in self.sort_faces():
-            if self.is_backfacing(face):  # skip backfacing faces
-                continue
-            
-            v1 = np.array(self.vertices[face[0]])
-            v2 = np.array(self.vertices[face[1]])
-            v3 = np.array(self.vertices[face[2]])
-            normal = np.cross(v2 - v1, v3 - v1)
 
-            to_light = np.array(self.light_source) - v1
-            cos_theta = np.dot(normal, to_light) / (np.linalg.norm(normal) * np.linalg.norm(to_light))
+        with self.profiler.stage("project"):
+            coords = screen[self.detail.face_vertices].ravel().tolist()
+            offsets = self.detail.face_offsets.tolist()
 
-            shade = int(255 * (cos_theta + 1) / 2)
-            color = '#{:02x}{:02x}{:02x}'.format(shade, shade, shade)
+        if self.wireframe:
+            # smoothed outlines need whole polygons, so shared edges get drawn twice here
+            order = self.sort_faces().tolist()
+            self.profiler.count(drawn=int(len(outside) - outside.sum()), culled=int(outside.sum()))
+            with self.profiler.stage("submit"):
+                self.polygons.draw(coords, offsets, order, hidden=outside.tolist(), outline="white",
+                                   smooth=self.curves, faces=faces)
+            return
 
-            coords = self.perspective_projection([self.vertices[i] for i in face])
-            coords = [(x + self.offset, y + self.offset) for x, y in coords]  # Offset the coordinates
-            self.canvas.create_polygon(coords, fill=color, smooth=self.curves)
+        _, culled, shades = self.cull_and_shade()
+        culled |= outside
+        fills = self.materials()[1][self.detail.face_materials, shades].tolist()
+        order = self.sort_faces().tolist()
+        self.profiler.count(drawn=int(len(culled) - culled.sum()), culled=int(culled.sum()))
+        with self.profiler.stage("submit"):
+            self.polygons.draw(coords, offsets, order, fills=fills, hidden=culled.tolist(), smooth=self.curves,
+                               faces=faces)
 
         # for edge in self.edges:
         #     x1, y1, z1 = self.vertices[edge[0]]
@@ -235,18 +612,12 @@ class Renderer(ttk.Frame):
         #     x, y = coords[0]
         #     self.canvas.create_text(x + self.offset, y + self.offset, text="+", fill='black')
 
-    def animate(self):
-        self.rotation_matrix = np.dot(self.rotate_x(0.0), np.dot(self.rotate_y(0.1), self.rotate_z(0.0)))
-        self.vertices = [np.dot(self.rotation_matrix, vertex) for vertex in self.vertices]
-
-        self.canvas.delete("all")
-        self.draw_mesh()
-
-        if self.is_animating:
-            self.animation_job = self.after(10, self.animate)
+    def animate(self, frames=1):
+        # called by the scheduler before each frame, skipped frames still turn the model
+        self.spin = (self.spin + 0.1 * frames) % (2 * math.pi)
 
     def run(self):
-        self.animate()
+        self.scheduler.request()
         self.mainloop()
 
 if __name__ == "__main__":
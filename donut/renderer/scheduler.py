@@ -0,0 +1,65 @@
+import time
+
+
+class FrameScheduler:
+    """Runs `draw` at most once per frame on a Tk widget's event loop
+
+    request() asks for a redraw; any number of requests before the frame
+    fires collapse into one, so bursts of slider events cost a single draw.
+    start(tick) runs continuously, calling tick(frames) before each draw with
+    how many frame intervals have passed, so a slow frame skips ahead instead
+    of queueing up late ones. The delay to the next frame is whatever is left
+    of the interval after the last draw.
+    """
+    def __init__(self, widget, draw, fps=60):
+        self.widget = widget
+        self.draw = draw
+        self.interval = 1.0 / fps
+        self.tick = None
+        self.job = None
+        self.last_frame = None
+        self.frame_time = 0.0
+        self.dropped = 0
+
+    @property
+    def running(self):
+        return self.tick is not None
+
+    def request(self):
+        if self.job is None:
+            self.job = self.widget.after(self.delay(), self.frame)
+
+    def start(self, tick):
+        self.tick = tick
+        self.last_frame = None
+        self.request()
+
+    def stop(self):
+        self.tick = None
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+
+    def delay(self):
+        if self.last_frame is None:
+            return 0
+        remaining = self.interval - (time.perf_counter() - self.last_frame)
+        return max(int(remaining * 1000), 0)
+
+    def frame(self):
+        self.job = None
+        start = time.perf_counter()
+
+        if self.tick is not None:
+            frames = 1
+            if self.last_frame is not None:
+                frames = max(round((start - self.last_frame) / self.interval), 1)
+            self.dropped += frames - 1
+            self.tick(frames)
+
+        self.last_frame = start
+        self.draw()
+        self.frame_time = time.perf_counter() - start
+
+        if self.tick is not None:
+            self.request()
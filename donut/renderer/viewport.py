@@ -0,0 +1,28 @@
+class Viewport:
+    """Size and centre of a canvas, cached and kept up to date from <Configure>
+
+    Reading it never goes back to Tk. `listeners` are called with the
+    viewport only when the size actually changes, which is when anything
+    derived from it (centre, projection) needs recomputing.
+    """
+    def __init__(self, canvas, *listeners):
+        self.canvas = canvas
+        self.width = int(canvas["width"])
+        self.height = int(canvas["height"])
+        self.listeners = list(listeners)
+        canvas.bind("<Configure>", self.on_configure, add="+")
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def centre(self):
+        return self.width / 2, self.height / 2
+
+    def on_configure(self, event):
+        if (event.width, event.height) == (self.width, self.height):
+            return
+        self.width, self.height = event.width, event.height
+        for listener in self.listeners:
+            listener(self)